@@ -1,9 +1,12 @@
 __author__ = 'Junki Ishida'
 
-from .declarations import NotExist, Entity
+from .declarations import NotExist, Entity, SlotsEntity, LazyEntity
 from .models import Model, ListModel
 from .serializer import Serializer
+from .parallel import ParallelSerializer
+from .stats import Stats
 from ._xml import xmlnsmap, register_xmlnsmap, unregister_xmlns, unregister_prefix
+from ._json import JsonBackend, register_json_backend, set_json_backend
 
 
 def __loaded():
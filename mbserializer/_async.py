@@ -0,0 +1,86 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import asyncio
+import inspect
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+async def _achunks(data, chunk_size):
+    if isinstance(data, (bytes, str,)):
+        yield data
+        return
+    read = getattr(data, 'read', None)
+    if read is None:
+        async for chunk in data:
+            yield chunk
+        return
+    while True:
+        chunk = read(chunk_size)
+        if inspect.isawaitable(chunk):
+            chunk = await chunk
+        if not chunk:
+            break
+        yield chunk
+
+
+class _Worker(object):
+    # lxml parsers and trees must stay on the thread that created them, so the parser or iterdump
+    # generator is created, used and released by a single thread.
+    def __init__(self, executor):
+        self.loop = asyncio.get_event_loop()
+        self.shutdown = executor is None
+        self.executor = ThreadPoolExecutor(1) if executor is None else executor
+        self.state = []
+
+    def __call__(self, func, *args):
+        return self.loop.run_in_executor(self.executor, func, *args)
+
+    async def start(self, func):
+        await self(lambda: self.state.append(func()))
+
+    async def close(self):
+        try:
+            await self(self.state.clear)
+        finally:
+            if self.shutdown:
+                self.executor.shutdown(wait=False)
+
+
+async def aiterload(self, data, data_type=None, executor=None, **options):
+    chunk_size = options.pop('chunk_size', 65536)
+    worker = _Worker(executor)
+    try:
+        await worker.start(lambda: self.parser(data_type, **options))
+        async for chunk in _achunks(data, chunk_size):
+            for item in await worker(lambda chunk: worker.state[0].feed(chunk), chunk):
+                yield item
+        for item in await worker(lambda: worker.state[0].close()):
+            yield item
+    finally:
+        await worker.close()
+
+
+async def aload(self, data, data_type=None, executor=None, **options):
+    items = [item async for item in self.aiterload(data, data_type, executor, **options)]
+    return items if self.model_class._islist else items[0]
+
+
+async def adump(self, data, writer, data_type=None, executor=None, **options):
+    worker = _Worker(executor)
+    drain = getattr(writer, 'drain', None)
+    try:
+        await worker.start(lambda: self.iterdump(data, data_type, **options))
+        while True:
+            chunk = await worker(lambda: next(worker.state[0], None))
+            if chunk is None:
+                break
+            result = writer.write(chunk)
+            if inspect.isawaitable(result):
+                await result
+            if drain is not None:
+                await drain()
+    finally:
+        await worker.close()
@@ -8,6 +8,8 @@ from datetime import datetime
 PY2 = sys.version_info[0] == 2
 PY26 = PY2 and sys.version_info[1] == 6
 PY3 = sys.version_info[0] == 3
+DICT_ORDERED = sys.version_info >= (3, 7)
+ASYNC = sys.version_info >= (3, 6)
 
 if PY2:
     str_types = (str, unicode,)
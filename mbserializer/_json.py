@@ -2,46 +2,609 @@
 
 __author__ = 'Junki Ishida'
 
-from .exceptions import ParseError
-from .utils import _to_dict, _parse_dict
-from ._compat import str_types, raise_with_inner, PY2, PY3
+from .exceptions import ParseError, FormatError
+from .utils import _to_dict, _dump_dict, _parse_entity, _withfactory, _iterchunks, _getbuffer, _BufferedParser, \
+    _lazyparser, _getmask, _popmask, _MISSING, SCALAR, DELEGATE, LIST, DELEGATE_LIST
+from .declarations import NotExist
+from . import converters
+from ._compat import str_types, int_types, iteritems, raise_with_inner, PY2, PY3, DICT_ORDERED
 
+import re
 import json
+import codecs
 
+from decimal import Decimal
 
-def dump_json_str(model_class, data_type, data, **options):
-    ordered = options.pop('ordered', True)
+from json.decoder import WHITESPACE
+from json.encoder import encode_basestring, encode_basestring_ascii, INFINITY
+
+_BEFORE_ARRAY = 0
+_FIRST_VALUE = 1
+_AFTER_VALUE = 2
+_NEXT_VALUE = 3
+_AFTER_ARRAY = 4
+
+_STRUCTURE = re.compile(r'[\[\]{},"\\]')
+_STRING = re.compile(r'["\\]')
+_NUMBER_START = '-0123456789'
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+
+
+class JsonBackend(object):
+    # subclasses override dumps or dumpb, and loads; anything not overridden uses the standard json module.
+    name = None
+    buffers = False
+
+    def dumps(self, obj, **options):
+        return _stdlib_backend.dumps(obj, **options)
+
+    def dumpb(self, obj, **options):
+        result = self.dumps(obj, **options)
+        if PY2 and isinstance(result, bytes):
+            return result
+        return result.encode('utf-8')
+
+    def loads(self, data, **options):
+        return _stdlib_backend.loads(data, **options)
+
+
+class StdlibJsonBackend(JsonBackend):
+    name = 'json'
+
+    def dumps(self, obj, **options):
+        return json.dumps(obj, **options)
+
+    def loads(self, data, **options):
+        if PY3 and not isinstance(data, str):
+            data = codecs.decode(data, 'utf-8')
+        return json.loads(data, **options)
+
+
+_stdlib_backend = StdlibJsonBackend()
+
+
+def _native_options(options, defaults):
+    native = dict(defaults)
+    rest = {}
+    for k, v in iteritems(options):
+        if k in native:
+            native[k] = v
+        elif k == 'separators' and tuple(v) == (',', ':',):
+            continue
+        else:
+            rest[k] = v
+    return native, rest
+
+
+class OrjsonBackend(JsonBackend):
+    name = 'orjson'
+    buffers = True
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def dumps(self, obj, **options):
+        return self.dumpb(obj, **options).decode('utf-8')
+
+    def dumpb(self, obj, **options):
+        native, rest = _native_options(options, {'indent': None, 'sort_keys': False, 'ensure_ascii': False})
+        if rest or native['indent'] not in (None, 2,) or native['ensure_ascii']:
+            return _stdlib_backend.dumpb(obj, **options)
+        option = 0
+        if native['indent']:
+            option |= self.orjson.OPT_INDENT_2
+        if native['sort_keys']:
+            option |= self.orjson.OPT_SORT_KEYS
+        return self.orjson.dumps(obj, option=option)
+
+    def loads(self, data, **options):
+        if options:
+            return _stdlib_backend.loads(data, **options)
+        return self.orjson.loads(data)
+
+
+class UjsonBackend(JsonBackend):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+
+        self.ujson = ujson
+
+    def dumps(self, obj, **options):
+        native, rest = _native_options(options, {'indent': None, 'sort_keys': False, 'ensure_ascii': True})
+        if rest or not isinstance(native['indent'], (type(None),) + int_types):
+            return _stdlib_backend.dumps(obj, **options)
+        native['indent'] = native['indent'] or 0
+        return self.ujson.dumps(obj, escape_forward_slashes=False, **native)
+
+    def loads(self, data, **options):
+        if options:
+            return _stdlib_backend.loads(data, **options)
+        return self.ujson.loads(data)
+
+
+class RapidjsonBackend(JsonBackend):
+    name = 'rapidjson'
+
+    def __init__(self):
+        import rapidjson
+
+        self.rapidjson = rapidjson
+
+    def dumps(self, obj, **options):
+        native, rest = _native_options(options, {'indent': None, 'sort_keys': False, 'ensure_ascii': True})
+        if rest or not isinstance(native['indent'], (type(None),) + int_types):
+            return _stdlib_backend.dumps(obj, **options)
+        return self.rapidjson.dumps(obj, **native)
+
+    def loads(self, data, **options):
+        if options:
+            return _stdlib_backend.loads(data, **options)
+        return self.rapidjson.loads(data)
+
+
+_json_backend_classes = {
+    'json': StdlibJsonBackend,
+    'orjson': OrjsonBackend,
+    'ujson': UjsonBackend,
+    'rapidjson': RapidjsonBackend,
+}
+_json_backends = {'json': _stdlib_backend}
+_auto_json_backends = ('orjson', 'rapidjson', 'ujson',)
+_default_json_backend = 'json'
+
+
+def register_json_backend(name, backend_class):
+    _json_backend_classes[name] = backend_class
+    _json_backends.pop(name, None)
+
+
+def set_json_backend(name):
+    global _default_json_backend
+    _default_json_backend = get_json_backend(name)
+
+
+def get_json_backend(name=None):
+    if name is None:
+        name = _default_json_backend
+    if isinstance(name, JsonBackend):
+        return name
+    if name == 'auto':
+        for auto in _auto_json_backends:
+            try:
+                return get_json_backend(auto)
+            except ImportError:
+                pass
+        return _stdlib_backend
+    backend = _json_backends.get(name)
+    if backend is None:
+        if name not in _json_backend_classes:
+            raise ValueError('unknown json backend: {0}'.format(name))
+        backend = _json_backends[name] = _json_backend_classes[name]()
+    return backend
+
+
+def _dump_data(model_class, data_type, data, ordered, mask=None):
     if model_class._islist:
-        _data = []
-        for d in data or ():
-            _data.append(_to_dict(model_class, data_type, d, ordered))
+        plan = model_class.__model__._getdumpplan(data_type, mask)
+        return [_dump_dict(plan, d, ordered) for d in data or ()]
+    return _to_dict(model_class, data_type, data, ordered, mask)
+
+
+_intrepr = int.__repr__ if PY3 else str
+_floatrepr = float.__repr__ if PY3 else repr
+
+
+def _write_int(value):
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    return _intrepr(value)
+
+
+def _write_bool(value):
+    return 'true' if value else 'false'
+
+
+def _write_float(value):
+    if value != value:
+        return 'NaN'
+    if value == INFINITY:
+        return 'Infinity'
+    if value == -INFINITY:
+        return '-Infinity'
+    return _floatrepr(value)
+
+
+_str_converters = frozenset((
+    converters.str_to_str,
+    converters.str_to_unicode,
+    converters.decimal_to_str,
+    converters.datetime_to_str,
+    converters.datetime_to_isostr,
+    converters.date_to_str,
+    converters.date_to_isostr,
+    converters.enum_to_str,
+))
+
+_writers = {
+    converters.int_to_int: _write_int,
+    converters.bool_to_bool: _write_bool,
+    converters.float_to_float: _write_float,
+    converters.int_or_float_to_float: _write_float,
+}
+
+
+def _getwriter(converter, encode_str, encode):
+    func = getattr(converter, 'func', converter)
+    if func in _str_converters:
+        return encode_str
+    return _writers.get(func, encode)
+
+
+def _compile_json_writer(model_class, data_type, separators, ensure_ascii, mask):
+    item_separator, key_separator = separators
+    encode_str = encode_basestring_ascii if ensure_ascii else encode_basestring
+    encode = json.JSONEncoder(separators=separators, ensure_ascii=ensure_ascii).encode
+    submasks = {} if mask is None else dict(mask)
+    plan = []
+    for k, key, required, nullable, kind, converter, subplan in model_class._getdumpplan(data_type, mask):
+        prefix = item_separator + encode_str(key) + key_separator
+        if kind in (DELEGATE, DELEGATE_LIST):
+            write = None
+            subplan = _getjsonwriter(model_class._fields[k].model_class, data_type, separators, ensure_ascii,
+                                     submasks.get(k))
+        else:
+            write = _getwriter(converter, encode_str, encode)
+        plan.append((k, prefix, required, nullable, kind, converter, write, subplan,))
+    return item_separator, tuple(plan)
+
+
+def _getjsonwriter(model_class, data_type, separators, ensure_ascii, mask=None):
+    return model_class._getplan(('json/direct', data_type, separators, ensure_ascii, mask,), _compile_json_writer,
+                                data_type, separators, ensure_ascii, mask)
+
+
+def _write_object(plan, data, parts):
+    separator, plan = plan
+    isdict = isinstance(data, dict)
+    parts.append('{')
+    start = len(parts)
+    for k, prefix, required, nullable, kind, converter, write, subplan in plan:
+        src = data.get(k, _MISSING) if isdict else getattr(data, k, _MISSING)
+        if src is _MISSING:
+            if not required:
+                continue
+            raise FormatError('"{0}" is not found.'.format(k))
+        if not required and src is NotExist:
+            continue
+        parts.append(prefix)
+        if nullable and src is None:
+            parts.append('null')
+        elif kind == SCALAR:
+            parts.append(write(converter(src)))
+        elif kind == DELEGATE:
+            _write_object(subplan, src, parts)
+        elif kind == LIST:
+            parts.append('[' + separator.join([write(converter(v)) for v in src]) + ']')
+        else:
+            _write_array(subplan, src, parts)
+    if len(parts) > start:
+        parts[start] = parts[start][len(separator):]
+    parts.append('}')
+
+
+def _write_array(plan, data, parts):
+    parts.append('[')
+    separator = ''
+    for d in data:
+        parts.append(separator)
+        _write_object(plan, d, parts)
+        separator = plan[0]
+    parts.append(']')
+
+
+def _direct_options(options, backend):
+    if not isinstance(backend, StdlibJsonBackend):
+        return None
+    separators = (', ', ': ',)
+    ensure_ascii = True
+    for k, v in iteritems(options):
+        if k == 'separators':
+            separators = separators if v is None else tuple(v)
+        elif k == 'ensure_ascii':
+            ensure_ascii = bool(v)
+        elif k in ('skipkeys', 'check_circular',):
+            continue
+        elif k == 'allow_nan' and v:
+            continue
+        elif k == 'sort_keys' and not v:
+            continue
+        elif k in ('indent', 'cls', 'default',) and v is None:
+            continue
+        else:
+            return None
+    return separators, ensure_ascii
+
+
+def _write_json(model_class, data_type, data, separators, ensure_ascii, mask=None):
+    parts = []
+    if model_class._islist:
+        _write_array(_getjsonwriter(model_class.__model__, data_type, separators, ensure_ascii, mask), data or (),
+                     parts)
     else:
-        _data = _to_dict(model_class, data_type, data, ordered)
-    return json.dumps(_data, **options)
+        _write_object(_getjsonwriter(model_class, data_type, separators, ensure_ascii, mask), data, parts)
+    return ''.join(parts)
+
+
+def json_str_dumper(model_class, data_type, **options):
+    ordered = options.pop('ordered', True) and not DICT_ORDERED
+    direct = options.pop('direct', False)
+    backend = get_json_backend(options.pop('backend', None))
+    mask = _popmask(model_class.__model__ if model_class._islist else model_class, options)
+    if direct:
+        direct = _direct_options(options, backend)
+        if direct is not None:
+            separators, ensure_ascii = direct
+            return lambda data: _write_json(model_class, data_type, data, separators, ensure_ascii, mask)
+    return lambda data: backend.dumps(_dump_data(model_class, data_type, data, ordered, mask), **options)
+
+
+def json_bytes_dumper(model_class, data_type, **options):
+    ordered = options.pop('ordered', True) and not DICT_ORDERED
+    direct = options.pop('direct', False)
+    backend = get_json_backend(options.pop('backend', None))
+    mask = _popmask(model_class.__model__ if model_class._islist else model_class, options)
+    if direct:
+        direct = _direct_options(options, backend)
+        if direct is not None:
+            separators, ensure_ascii = direct
+            return lambda data: _write_json(model_class, data_type, data, separators, ensure_ascii,
+                                            mask).encode('utf-8')
+    return lambda data: backend.dumpb(_dump_data(model_class, data_type, data, ordered, mask), **options)
+
+
+def dump_json_str(model_class, data_type, data, **options):
+    return json_str_dumper(model_class, data_type, **options)(data)
 
 
 def dump_json_bytes(model_class, data_type, data, **options):
-    result = dump_json_str(model_class, data_type, data, **options)
-    if PY2 and isinstance(result, bytes):
-        return result
-    return result.encode('utf-8')
+    return json_bytes_dumper(model_class, data_type, **options)(data)
 
 
-def load_json(model_class, data_type, data, **options):
-    if PY3 and isinstance(data, bytes):
-        data = data.decode('utf-8')
-    if not isinstance(data, str_types):
+def _json_item_encoder(model_class, data_type, options):
+    ordered = options.pop('ordered', True) and not DICT_ORDERED
+    options.pop('backend', None)
+    options.pop('direct', None)
+    mask = _popmask(model_class.__model__, options)
+    encoder = (options.pop('cls', None) or json.JSONEncoder)(**options)
+    plan = model_class.__model__._getdumpplan(data_type, mask)
+    indent = encoder.indent
+    if indent is None:
+        newline = ''
+    else:
+        newline = '\n' + (' ' * indent if isinstance(indent, int) else indent)
+
+    def encode(data):
+        chunk = encoder.encode(_dump_dict(plan, data, ordered))
+        return chunk.replace('\n', newline) if newline else chunk
+
+    return encode, encoder.item_separator, newline
+
+
+def iterdump_json_str(model_class, data_type, data, **options):
+    if not model_class._islist:
+        ordered = options.pop('ordered', True) and not DICT_ORDERED
+        options.pop('backend', None)
+        options.pop('direct', None)
+        mask = _popmask(model_class, options)
+        encoder = (options.pop('cls', None) or json.JSONEncoder)(**options)
+        for chunk in encoder.iterencode(_to_dict(model_class, data_type, data, ordered, mask)):
+            yield chunk
+        return
+    encode, item_separator, newline = _json_item_encoder(model_class, data_type, options)
+    separator = '['
+    for d in data or ():
+        yield separator + newline + encode(d)
+        separator = item_separator
+    if separator == '[':
+        yield '[]'
+    else:
+        yield '\n]' if newline else ']'
+
+
+def iterdump_json_bytes(model_class, data_type, data, **options):
+    for chunk in iterdump_json_str(model_class, data_type, data, **options):
+        if PY2 and isinstance(chunk, bytes):
+            yield chunk
+        else:
+            yield chunk.encode('utf-8')
+
+
+def _decimal_options(options):
+    if options.pop('decimal', False):
+        options['parse_float'] = Decimal
+    return options
+
+
+def json_loader(model_class, data_type, **options):
+    forcekey = options.pop('forcekey', False)
+    entity = options.pop('entity', None)
+    into = options.pop('into', None)
+    lazy = options.pop('lazy', False)
+    fields = options.pop('fields', None)
+    backend = get_json_backend(options.pop('backend', None))
+    _decimal_options(options)
+    islist = model_class._islist
+    entity_class = model_class.__model__ if islist else model_class
+    plan = entity_class._getparseplan(data_type, forcekey, entity, _getmask(entity_class, fields))
+    parse = _lazyparser(_parse_entity, entity_class, plan) if lazy else _parse_entity
+    plan = _withfactory(plan, into)
+
+    def load(data):
+        data = _decode_json(backend, data, options)
+        if islist:
+            if not isinstance(data, list):
+                raise FormatError()
+            return [parse(plan, d) for d in data]
+        return parse(plan, data)
+
+    return load
+
+
+def _decode_json(backend, data, options):
+    buffer = _getbuffer(data)
+    if buffer is not None:
+        data = buffer if backend.buffers else codecs.decode(buffer, 'utf-8')
+    elif not isinstance(data, (bytes,) + str_types):
         data = data.read()
     try:
-        data = json.loads(data, **options)
+        return backend.loads(data, **options)
     except ValueError as e:
         raise_with_inner(ParseError, e)
-    forcekey = options.get('forcekey')
+
+
+def load_json(model_class, data_type, data, **options):
+    return json_loader(model_class, data_type, **options)(data)
+
+
+class JsonArrayDecoder(object):
+    def __init__(self, decoder=None):
+        self.decoder = decoder or json.JSONDecoder()
+        self.buffer = ''
+        self.state = _BEFORE_ARRAY
+        self.depth = 0
+        self.instring = False
+        self.escaped = False
+
+    def feed(self, text):
+        self.buffer += text
+        if not self.__scan(text):
+            return []
+        return self.__decode(False)
+
+    def __scan(self, text):
+        # decoding is retried only when this text may complete a top-level value
+        depth = self.depth
+        instring = self.instring
+        pos = 1 if self.escaped and text else 0
+        self.escaped = self.escaped and not text
+        boundary = False
+        length = len(text)
+        while pos < length:
+            match = (_STRING if instring else _STRUCTURE).search(text, pos)
+            if match is None:
+                break
+            c = match.group()
+            pos = match.end()
+            if c == '\\':
+                if pos == length:
+                    self.escaped = True
+                pos += 1
+                continue
+            if c == '"':
+                instring = not instring
+            elif c in '[{':
+                depth += 1
+            elif c in ']}':
+                depth -= 1
+            if depth <= 1 and not instring:
+                boundary = True
+        self.depth = depth
+        self.instring = instring
+        return boundary
+
+    def close(self):
+        values = self.__decode(True)
+        if self.state != _AFTER_ARRAY:
+            raise ParseError('unexpected end of json array.')
+        return values
+
+    def __decode(self, final):
+        values = []
+        buffer = self.buffer
+        length = len(buffer)
+        pos = 0
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos == length:
+                break
+            state = self.state
+            c = buffer[pos]
+            if state == _BEFORE_ARRAY:
+                if c != '[':
+                    raise ParseError('json array is expected.')
+                pos += 1
+                self.state = _FIRST_VALUE
+            elif state == _AFTER_VALUE:
+                if c == ',':
+                    self.state = _NEXT_VALUE
+                elif c == ']':
+                    self.state = _AFTER_ARRAY
+                else:
+                    raise ParseError('"," or "]" is expected at {0}.'.format(pos))
+                pos += 1
+            elif state == _AFTER_ARRAY:
+                raise ParseError('extra data after json array.')
+            elif state == _FIRST_VALUE and c == ']':
+                pos += 1
+                self.state = _AFTER_ARRAY
+            else:
+                try:
+                    value, end = self.decoder.raw_decode(buffer, pos)
+                except ValueError as e:
+                    if final:
+                        raise_with_inner(ParseError, e)
+                    break
+                if not final and c in _NUMBER_START and _NUMBER_TAIL.match(buffer, end):
+                    break
+                values.append(value)
+                pos = end
+                self.state = _AFTER_VALUE
+        self.buffer = buffer[pos:]
+        return values
+
+
+class JsonListParser(object):
+    def __init__(self, model_class, data_type, **options):
+        forcekey = options.pop('forcekey', False)
+        entity = options.pop('entity', None)
+        into = options.pop('into', None)
+        lazy = options.pop('lazy', False)
+        mask = _getmask(model_class.__model__, options.pop('fields', None))
+        options.pop('backend', None)
+        _decimal_options(options)
+        self.decoder = JsonArrayDecoder((options.pop('cls', None) or json.JSONDecoder)(**options))
+        self.textdecoder = codecs.getincrementaldecoder('utf-8')()
+        plan = model_class.__model__._getparseplan(data_type, forcekey, entity, mask)
+        self.parse = _lazyparser(_parse_entity, model_class.__model__, plan) if lazy else _parse_entity
+        self.plan = _withfactory(plan, into)
+
+    def feed(self, chunk):
+        if isinstance(chunk, (bytes, memoryview,)) and not (PY2 and isinstance(chunk, str)):
+            chunk = self.textdecoder.decode(chunk)
+        return [self.parse(self.plan, value) for value in self.decoder.feed(chunk)]
+
+    def close(self):
+        values = self.decoder.feed(self.textdecoder.decode(b'', True)) + self.decoder.close()
+        return [self.parse(self.plan, value) for value in values]
+
+
+def json_parser(model_class, data_type, **options):
     if model_class._islist:
-        result = []
-        for d in data:
-            entity = _parse_dict(model_class, data_type, d, forcekey)
-            result.append(entity)
-        return result
-    else:
-        return _parse_dict(model_class, data_type, data, forcekey)
+        return JsonListParser(model_class, data_type, **options)
+    return _BufferedParser(json_loader(model_class, data_type, **options), False)
+
+
+def iterload_json(model_class, data_type, data, **options):
+    chunk_size = options.pop('chunk_size', 65536)
+    parser = json_parser(model_class, data_type, **options)
+    for chunk in _iterchunks(data, chunk_size):
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -5,7 +5,7 @@ __author__ = 'Junki Ishida'
 from . import utils
 from .declarations import NotExist, Entity
 from .exceptions import FormatError, ParseError
-from ._compat import iteritems, str_types, raise_with_inner, PY2, PY3
+from ._compat import iteritems, str_types, unicode_type, raise_with_inner, PY2, PY3, OrderedDict
 
 import re
 
@@ -27,13 +27,23 @@ try:
 except ImportError as e:
     defusedxml_loaded = False
 
-if PY2:
-    RE_XML_DECLARATION = re.compile("""
-^<\?xml
-[ \\t\\r\\n]version[ \\t\\r\\n]?=[ \\t\\r\\n]?("1\.[0-9]+"|'1\.[0-9]+')
-[ \\t\\r\\n]encoding[ \\t\\r\\n]?=[ \\t\\r\\n]?("([a-zA-Z][a-zA-Z0-9._\-]*)"|'([a-zA-Z][a-zA-Z0-9._\-]*)')
+RE_XML_DECLARATION = re.compile("""
+^<\\?xml
+[ \\t\\r\\n]version[ \\t\\r\\n]?=[ \\t\\r\\n]?("1\\.[0-9]+"|'1\\.[0-9]+')
+[ \\t\\r\\n]encoding[ \\t\\r\\n]?=[ \\t\\r\\n]?("([a-zA-Z][a-zA-Z0-9._\\-]*)"|'([a-zA-Z][a-zA-Z0-9._\\-]*)')
 ([ \\t\\r\\n]standalone[ \\t\\r\\n]?=[ \\t\\r\\n]?("(yes|no)"|'(yes|no)'))?
-[ \\t\\r\\n]?\?>""", re.VERBOSE)
+[ \\t\\r\\n]?\\?>""", re.VERBOSE)
+
+
+def _xmlencoding(data):
+    match = RE_XML_DECLARATION.match(data)
+    if match:
+        return match.group(3) or match.group(4)
+    return 'utf-8'
+
+
+def _encodexml(data):
+    return data.encode(_xmlencoding(data))
 
 
 def _getxmlns(arg, default):
@@ -42,10 +52,20 @@ def _getxmlns(arg, default):
     return arg or default
 
 
+_TAG_CACHE_SIZE = 1024
+_tagcache = {}
+
+
 def _gettag(tag, xmlns):
-    if xmlns:
-        return str(QName(xmlns, tag))
-    return tag
+    if not xmlns:
+        return tag
+    key = (tag, xmlns,)
+    result = _tagcache.get(key)
+    if result is None:
+        if len(_tagcache) >= _TAG_CACHE_SIZE:
+            _tagcache.clear()
+        result = _tagcache[key] = str(QName(xmlns, tag))
+    return result
 
 
 NILTAG = _gettag('nil', 'http://www.w3.org/2001/XMLSchema-instance')
@@ -152,176 +172,410 @@ def _getnsmap(xmlnsset, rootxmlns):
             nsmap[None] = xmlns
         elif xmlnsmap.hasxmlns(xmlns):
             nsmap[xmlnsmap.getprefix(xmlns)] = xmlns
-    return nsmap
+    # same order as etree.xmlfile writes them, so streamed and whole documents match.
+    return OrderedDict(sorted(iteritems(nsmap), key=lambda item: item[0] or ''))
+
+
+TEXT = 0
+ATTRIBUTE = 1
+ELEMENT = 2
+DELEGATE = 3
+LIST = 4
+DELEGATE_LIST = 5
+
+
+def _getxmltype(field):
+    if field._istext:
+        return TEXT
+    if field._isattr:
+        return ATTRIBUTE
+    if field._islist:
+        return DELEGATE_LIST if field._islistdelegate else LIST
+    return DELEGATE if field._isdelegate else ELEMENT
 
 
-def _build_element(model_class, data_type, data, root, xmlns):
+def _compile_xml_plan(model_class, data_type, xmlns, forcekey, dump, entity, mask):
+    plan = []
+    for k, f, submask in utils._masked(model_class, mask):
+        xmltype = _getxmltype(f)
+        key = f.get_key(k)
+        tag = itemtag = subplan = None
+        if xmltype == ATTRIBUTE:
+            tag = _gettag(key, f.xmlns)
+        elif xmltype in (LIST, DELEGATE_LIST,):
+            if f.nested:
+                tag = _gettag(key, _getxmlns(f.nested_xmlns, xmlns))
+            exmlns = _getxmlns(f.xmlns, xmlns)
+            itemtag = _gettag(f.tag, exmlns)
+            if xmltype == DELEGATE_LIST:
+                subplan = _getxmlplan(f.model_class, data_type, exmlns, forcekey, dump, entity, submask)
+        elif xmltype != TEXT:
+            fxmlns = _getxmlns(f.xmlns, xmlns)
+            tag = _gettag(key, fxmlns)
+            if xmltype == DELEGATE:
+                subplan = _getxmlplan(f.model_class, data_type, fxmlns, forcekey, dump, entity, submask)
+        if dump:
+            converter = utils._instrument(model_class, k, f, f._getdumpconverter(data_type) or utils._identity)
+        elif xmltype in (TEXT, ATTRIBUTE,):
+            # text and attribute values are loaded as they are, so there is nothing to time.
+            converter = utils._identity
+        else:
+            converter = utils._instrument(model_class, k, f, f._getparseconverter(data_type) or utils._identity)
+        missing = NotExist if forcekey else utils._MISSING
+        plan.append((k, f._required, missing, f._nullable, xmltype, tag, itemtag, converter, subplan,))
+    if dump:
+        return tuple(plan)
+    return utils._getfactory(model_class, entity), tuple(plan)
+
+
+def _getxmlplan(model_class, data_type, xmlns, forcekey, dump, entity=None, mask=None):
+    entity = entity or 'dict'
+    key = ('xml/dump' if dump else 'xml/parse', data_type, xmlns, forcekey, entity, mask,)
+    return model_class._getplan(key, _compile_xml_plan, data_type, xmlns, forcekey, dump, entity, mask)
+
+
+def _build(plan, data, root):
     isdict = isinstance(data, dict)
-    for k, f in iteritems(model_class._fields):
-        if not utils.haskey(data, k, isdict):
-            if not f._required:
+    for k, required, _, nullable, xmltype, tag, itemtag, converter, subplan in plan:
+        src = data.get(k, utils._MISSING) if isdict else getattr(data, k, utils._MISSING)
+        if src is utils._MISSING:
+            if not required:
                 continue
             raise FormatError()
-        src = utils.getvalue(data, k, isdict)
-        if not f._required and src is NotExist:
+        if not required and src is NotExist:
             continue
-        if f._istext:
-            root.text = f._dump(src, data_type)
-        elif f._ismember:
-            key = f.get_key(k)
-            if f._isattr:
-                if f.xmlns:
-                    key = _gettag(key, f.xmlns)
-                root.attrib[key] = f._dump(src, data_type)
+        if xmltype == TEXT:
+            root.text = converter(src)
+        elif xmltype == ATTRIBUTE:
+            root.set(tag, converter(src))
+        elif xmltype == LIST or xmltype == DELEGATE_LIST:
+            if tag is None:
+                listroot = root
             else:
-                hasniltag = f._nullable and src is None
-                if f._islist:
-                    if f.nested:
-                        fxmlns = _getxmlns(f.nested_xmlns, xmlns)
-                        tag = _gettag(key, fxmlns)
-                        listtoot = etree.SubElement(root, tag)
-                        if hasniltag:
-                            _setnil(listtoot)
-                            continue
-                    else:
-                        listtoot = root
-                    exmlns = _getxmlns(f.xmlns, xmlns)
-                    for v in src or ():
-                        tag = _gettag(f.tag, exmlns)
-                        element = etree.SubElement(listtoot, tag)
-                        if f._islistdelegate:
-                            _build_element(f.model_class, data_type, v, element, exmlns)
-                        else:
-                            element.text = f._dump(v, data_type)
+                listroot = etree.SubElement(root, tag)
+                if nullable and src is None:
+                    _setnil(listroot)
+                    continue
+            for v in src or ():
+                element = etree.SubElement(listroot, itemtag)
+                if xmltype == DELEGATE_LIST:
+                    _build(subplan, v, element)
                 else:
-                    fxmlns = _getxmlns(f.xmlns, xmlns)
-                    tag = _gettag(key, fxmlns)
-                    element = etree.SubElement(root, tag)
-                    if hasniltag:
-                        _setnil(element)
-                    else:
-                        if f._isdelegate:
-                            _build_element(f.model_class, data_type, src, element, fxmlns)
-                        else:
-                            element.text = f._dump(src, data_type)
+                    element.text = converter(v)
+        else:
+            element = etree.SubElement(root, tag)
+            if nullable and src is None:
+                _setnil(element)
+            elif xmltype == DELEGATE:
+                _build(subplan, src, element)
+            else:
+                element.text = converter(src)
 
 
-def dump_xml_bytes(model_class, data_type, data, **options):
+def _build_element(model_class, data_type, data, root, xmlns, mask=None):
+    _build(_getxmlplan(model_class, data_type, xmlns, False, True, mask=mask), data, root)
+
+
+def _getlistnsmap(model_class):
+    xmlns = model_class.__xmlns__
+    xmlnsset = model_class.__model__._getxmlnsset()
+    if xmlns is not None:
+        xmlnsset = xmlnsset | set((xmlns,))
+    return _getnsmap(xmlnsset, xmlns)
+
+
+def xml_bytes_dumper(model_class, data_type, **options):
     xmlns = model_class.__xmlns__
     tag = _gettag(model_class.__tag__, xmlns)
-    nsmap = _getnsmap((model_class.__model__ if model_class._islist else model_class)._getxmlnsset(), xmlns)
-    root = etree.Element(tag, nsmap=nsmap)
-    if model_class._islist:
-        elem_xmlns = model_class.__model__.__xmlns__
-        tag = _gettag(model_class.__model__.__tag__, elem_xmlns)
-        for d in data:
-            subroot = etree.SubElement(root, tag)
-            _build_element(model_class, data_type, d, subroot, elem_xmlns)
-    else:
-        _build_element(model_class, data_type, data, root, xmlns)
+    nsmap = _getlistnsmap(model_class) if model_class._islist else _getnsmap(model_class._getxmlnsset(), xmlns)
     xml_declaration = options.get('xml_declaration', True)
     encoding = options.get('encoding', 'utf-8')
     pretty_print = options.get('pretty_print', False)
-    return etree.tostring(root, xml_declaration=xml_declaration, encoding=encoding, pretty_print=pretty_print)
+    if model_class._islist:
+        elem_xmlns = model_class.__model__.__xmlns__
+        elem_tag = _gettag(model_class.__model__.__tag__, elem_xmlns)
+        mask = utils._getmask(model_class.__model__, options.get('only'), options.get('exclude'))
+        plan = _getxmlplan(model_class.__model__, data_type, elem_xmlns, False, True, mask=mask)
+    else:
+        mask = utils._getmask(model_class, options.get('only'), options.get('exclude'))
+        plan = _getxmlplan(model_class, data_type, xmlns, False, True, mask=mask)
+
+    def dump(data):
+        root = etree.Element(tag, nsmap=nsmap)
+        if model_class._islist:
+            for d in data:
+                _build(plan, d, etree.SubElement(root, elem_tag))
+        else:
+            _build(plan, data, root)
+        return etree.tostring(root, xml_declaration=xml_declaration, encoding=encoding, pretty_print=pretty_print)
 
+    return dump
 
-def dump_xml_str(model_class, data_type, data, **options):
-    result = dump_xml_bytes(model_class, data_type, data, **options)
+
+def xml_str_dumper(model_class, data_type, **options):
+    dump = xml_bytes_dumper(model_class, data_type, **options)
     if PY3:
         encoding = options.get('encoding', 'utf-8')
-        return result.decode(encoding)
-    return result
+        return lambda data: dump(data).decode(encoding)
+    return dump
 
 
-def _parse_xml(model_class, data_type, data, xmlns, forcekey):
-    entity = Entity()
-    if isinstance(data, str_types):
-        data = ElementTree.fromstring(data)
-    tag = _gettag(model_class.__tag__, xmlns)
-    if data.tag != tag:
-        raise FormatError()
-    for k, f in iteritems(model_class._fields):
-        key = f.get_key(k)
-        if f._istext:
+def dump_xml_bytes(model_class, data_type, data, **options):
+    return xml_bytes_dumper(model_class, data_type, **options)(data)
+
+
+def dump_xml_str(model_class, data_type, data, **options):
+    return xml_str_dumper(model_class, data_type, **options)(data)
+
+
+class _ChunkWriter(object):
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        del self.chunks[:]
+        return data
+
+
+def iterdump_xml_bytes(model_class, data_type, data, **options):
+    if not model_class._islist:
+        yield dump_xml_bytes(model_class, data_type, data, **options)
+        return
+    tag = _gettag(model_class.__tag__, model_class.__xmlns__)
+    elem_xmlns = model_class.__model__.__xmlns__
+    elem_tag = _gettag(model_class.__model__.__tag__, elem_xmlns)
+    nsmap = _getlistnsmap(model_class)
+    encoding = options.get('encoding', 'utf-8')
+    bom = u''.encode(encoding)
+    pretty_print = options.get('pretty_print', False)
+    mask = utils._getmask(model_class.__model__, options.get('only'), options.get('exclude'))
+    plan = _getxmlplan(model_class.__model__, data_type, elem_xmlns, False, True, mask=mask)
+    # each item is serialized inside the root, so it uses the root's namespace declarations as in dumps.
+    root = etree.Element(tag, nsmap=nsmap)
+    writer = _ChunkWriter()
+    with etree.xmlfile(writer, encoding=encoding) as xf:
+        if options.get('xml_declaration', True):
+            xf.write_declaration()
+        with xf.element(tag, nsmap=nsmap):
+            xf.flush()
+            yield writer.pop()
+            empty = True
+            for d in data or ():
+                empty = False
+                element = etree.SubElement(root, elem_tag)
+                _build(plan, d, element)
+                text = etree.tostring(root, encoding=unicode_type, pretty_print=pretty_print)
+                root.remove(element)
+                text = text[text.index('>') + 1:text.rindex('</') - (1 if pretty_print else 0)]
+                yield text.encode(encoding, 'xmlcharrefreplace')[len(bom):]
+            if pretty_print and not empty:
+                writer.write(u'\n'.encode(encoding)[len(bom):])
+    if pretty_print:
+        writer.write(u'\n'.encode(encoding)[len(bom):])
+    yield writer.pop()
+
+
+def iterdump_xml_str(model_class, data_type, data, **options):
+    for chunk in iterdump_xml_bytes(model_class, data_type, data, **options):
+        yield chunk.decode(options.get('encoding', 'utf-8')) if PY3 else chunk
+
+
+def _getchildren(data):
+    children = {}
+    for e in data:
+        elements = children.get(e.tag)
+        if elements is None:
+            children[e.tag] = [e]
+        else:
+            elements.append(e)
+    return children
+
+
+def _parse_element(plan, data, children=None):
+    factory, plan = plan
+    entity = Entity() if factory is None else {}
+    if children is None:
+        children = _getchildren(data)
+    for k, required, missing, nullable, xmltype, tag, itemtag, converter, subplan in plan:
+        if xmltype == TEXT:
             value = data.text
-        elif f._ismember:
-            if f._isattr:
-                key = _gettag(key, f.xmlns)
-                if not key in data.keys():
-                    raise FormatError()
-                value = data.attrib[key]
+        elif xmltype == ATTRIBUTE:
+            value = data.get(tag, utils._MISSING)
+            if value is utils._MISSING:
+                raise FormatError()
+        elif tag is None:
+            elements = children.get(itemtag, ())
+            if xmltype == DELEGATE_LIST:
+                value = [_parse_element(subplan, e) for e in elements]
             else:
-                if f._islist and not f.nested:
-                    fxmlns = _getxmlns(f.xmlns, xmlns)
-                    tag = _gettag(f.tag, fxmlns)
-                    value = []
-                    for e in data:
-                        if e.tag == tag:
-                            v = _parse_xml(f.model_class, data_type, e, fxmlns, forcekey) \
-                                if f._islistdelegate else f._parse(e.text, data_type)
-                            value.append(v)
-                else:
-                    fxmlns = _getxmlns(f.nested_xmlns if f._islist else f.xmlns, xmlns)
-                    tag = _gettag(key, fxmlns)
-                    element = None
-                    for e in data:
-                        if e.tag == tag:
-                            element = e
-                            break
-                    if element is None:
-                        if not f._required:
-                            if forcekey:
-                                entity[k] = NotExist
-                            continue
+                value = [converter(e.text) for e in elements]
+        else:
+            elements = children.get(tag)
+            element = elements[0] if elements else None
+            if element is None:
+                if not required:
+                    if missing is not utils._MISSING:
+                        entity[k] = missing
+                    elif factory is not None:
+                        entity[k] = NotExist
+                    continue
+                raise FormatError()
+            if nullable and _isnil(element):
+                value = None
+            elif xmltype == LIST or xmltype == DELEGATE_LIST:
+                value = []
+                for e in element:
+                    if e.tag != itemtag:
                         raise FormatError()
-                    if f._nullable and _isnil(element):
-                        value = None
-                    else:
-                        if f._islist:
-                            value = []
-                            exmlns = _getxmlns(f.xmlns, xmlns)
-                            tag = _gettag(f.tag, exmlns)
-                            for e in element:
-                                if e.tag == tag:
-                                    v = _parse_xml(f.model_class, data_type, e, exmlns, forcekey) \
-                                        if f._islistdelegate else f._parse(e.text, data_type)
-                                    value.append(v)
-                                else:
-                                    raise FormatError()
-                        else:
-                            value = _parse_xml(f.model_class, data_type, element, fxmlns, forcekey) \
-                                if f._isdelegate else f._parse(element.text, data_type)
+                    value.append(_parse_element(subplan, e) if xmltype == DELEGATE_LIST else converter(e.text))
+            elif xmltype == DELEGATE:
+                value = _parse_element(subplan, element)
+            else:
+                value = converter(element.text)
         entity[k] = value
-    return entity
+    return entity if factory is None else factory(**entity)
 
 
-def load_xml(model_class, data_type, data, **options):
-    try:
-        if isinstance(data, str_types):
-            if PY2 and isinstance(data, unicode):
-                encoding = 'utf-8'
-                match = RE_XML_DECLARATION.match(data)
-                if match:
-                    g3 = match.group(3)
-                    g4 = match.group(4)
-                    encoding = match.group(3) or match.group(4)
-                data = data.encode(encoding)
-            data = ElementTree.fromstring(data)
-        else:
-            data = ElementTree.parse(data).getroot()
-    except XMLParseError as e:
-        raise_with_inner(ParseError, e)
-    xmlns = model_class.__xmlns__
-    forcekey = options.get('forcekey', False)
+def _parse_children(plan, data):
+    return _parse_element(plan, data[0], data[1])
+
+
+def _lazyparser(model_class, plan):
+    parse = utils._lazyparser(_parse_children, model_class, plan)
+    return lambda plan, data: parse(plan, (data, _getchildren(data),))
+
+
+def xml_loader(model_class, data_type, **options):
+    forcekey = bool(options.get('forcekey', False))
+    entity = options.get('entity')
+    into = options.get('into')
+    tag = _gettag(model_class.__tag__, model_class.__xmlns__)
     if model_class._islist:
-        tag = _gettag(model_class.__tag__, xmlns)
-        elem_xmlns = model_class.__model__.__xmlns__
+        entity_class = model_class.__model__
+        elem_xmlns = entity_class.__xmlns__
+        elem_tag = _gettag(entity_class.__tag__, elem_xmlns)
+    else:
+        entity_class = model_class
+        elem_xmlns = model_class.__xmlns__
+    mask = utils._getmask(entity_class, options.get('fields'))
+    plan = _getxmlplan(entity_class, data_type, elem_xmlns, forcekey, False, entity, mask)
+    parse = _lazyparser(entity_class, plan) if options.get('lazy') else _parse_element
+    plan = utils._withfactory(plan, into)
+
+    def load(data):
+        try:
+            buffer = utils._getbuffer(data)
+            if buffer is not None:
+                data = ElementTree.fromstring(buffer)
+            elif isinstance(data, (bytes,) + str_types):
+                if PY2 and isinstance(data, unicode):
+                    data = _encodexml(data)
+                data = ElementTree.fromstring(data)
+            else:
+                data = ElementTree.parse(data).getroot()
+        except XMLParseError as e:
+            raise_with_inner(ParseError, e)
         if data.tag != tag:
             raise FormatError()
-        result = []
-        for e in data:
-            entity = _parse_xml(model_class, data_type, e, elem_xmlns, forcekey)
-            result.append(entity)
-        return result
-    else:
-        return _parse_xml(model_class, data_type, data, xmlns, forcekey)
\ No newline at end of file
+        if model_class._islist:
+            result = []
+            for e in data:
+                if e.tag != elem_tag:
+                    raise FormatError()
+                result.append(parse(plan, e))
+            return result
+        return parse(plan, data)
+
+    return load
+
+
+def load_xml(model_class, data_type, data, **options):
+    return xml_loader(model_class, data_type, **options)(data)
+
+
+def _checkdtd(element):
+    dtd = element.getroottree().docinfo.internalDTD
+    if dtd is not None and any(True for _ in dtd.iterentities()):
+        raise ParseError('entity declarations are forbidden.')
+
+
+class XmlListParser(object):
+    def __init__(self, model_class, data_type, **options):
+        forcekey = bool(options.get('forcekey', False))
+        self.tag = _gettag(model_class.__tag__, model_class.__xmlns__)
+        elem_xmlns = model_class.__model__.__xmlns__
+        self.elem_tag = _gettag(model_class.__model__.__tag__, elem_xmlns)
+        mask = utils._getmask(model_class.__model__, options.get('fields'))
+        plan = _getxmlplan(model_class.__model__, data_type, elem_xmlns, forcekey, False, options.get('entity'), mask)
+        self.lazy = bool(options.get('lazy'))
+        self.parse = _lazyparser(model_class.__model__, plan) if self.lazy else _parse_element
+        self.plan = utils._withfactory(plan, options.get('into'))
+        self.parser = etree.XMLPullParser(events=('end',), tag=self.elem_tag, resolve_entities=False,
+                                          no_network=True, load_dtd=False, remove_comments=True, remove_pis=True)
+        self.encoding = None
+        self.root = None
+
+    def feed(self, chunk):
+        if isinstance(chunk, memoryview):
+            chunk = chunk.tobytes()
+        elif not isinstance(chunk, bytes):
+            if self.encoding is None:
+                self.encoding = _xmlencoding(chunk)
+            chunk = chunk.encode(self.encoding)
+        try:
+            self.parser.feed(chunk)
+        except etree.XMLSyntaxError as e:
+            raise_with_inner(ParseError, e)
+        return self.__read()
+
+    def close(self):
+        try:
+            root = self.parser.close()
+        except etree.XMLSyntaxError as e:
+            raise_with_inner(ParseError, e)
+        items = self.__read()
+        _checkdtd(root)
+        if root.tag != self.tag or any(e.tag != self.elem_tag for e in root):
+            raise FormatError()
+        return items
+
+    def __read(self):
+        items = []
+        root = self.root
+        for _, element in self.parser.read_events():
+            if root is None:
+                _checkdtd(element)
+                root = self.root = element.getroottree().getroot()
+                if root.tag != self.tag:
+                    raise FormatError()
+            if element.getparent() is not root:
+                continue
+            if element.tag != self.elem_tag:
+                raise FormatError()
+            items.append(self.parse(self.plan, element))
+            if not self.lazy:
+                element.clear()
+            while element.getprevious() is not None:
+                if root[0].tag != self.elem_tag:
+                    raise FormatError()
+                del root[0]
+        return items
+
+
+def xml_parser(model_class, data_type, **options):
+    if model_class._islist:
+        return XmlListParser(model_class, data_type, **options)
+    return utils._BufferedParser(xml_loader(model_class, data_type, **options), False)
+
+
+def iterload_xml(model_class, data_type, data, **options):
+    parser = xml_parser(model_class, data_type, **options)
+    for chunk in utils._iterchunks(data, options.get('chunk_size', 65536)):
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
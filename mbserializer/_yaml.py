@@ -2,9 +2,11 @@
 
 __author__ = 'Junki Ishida'
 
-from .exceptions import ParseError
-from ._compat import OrderedDict, raise_with_inner, PY3
-from .utils import _to_dict, _parse_dict
+from .exceptions import ParseError, FormatError
+from ._compat import OrderedDict, raise_with_inner, PY3, DICT_ORDERED
+from .utils import _to_dict, _parse_entity, _withfactory, _getbuffer, _lazyparser, _getmask, _popmask
+
+import codecs
 
 try:
     import yaml
@@ -26,51 +28,78 @@ try:
             return SafeDumper.represent_dict(self, data.items())
 
     Dumper.add_representer(OrderedDict, Dumper.represent_ordereddict)
+
+    class OrderedDumper(Dumper):
+        pass
+
+    OrderedDumper.add_representer(dict, Dumper.represent_ordereddict)
     yaml_loaded = True
 except:
     yaml_loaded = False
 
 
-def _dump_yaml(model_class, data_type, data, **options):
+def _yaml_options(binary, options):
+    if binary:
+        if options.get('encoding') is None:
+            options['encoding'] = 'utf-8'
+    elif PY3 and 'encoding' in options:
+        options['encoding'] = None
     ordered = options.pop('ordered', True)
+    dumper = options.pop('Dumper', None)
+    if dumper is None:
+        if ordered and DICT_ORDERED:
+            dumper, ordered = OrderedDumper, False
+        else:
+            dumper = Dumper
+    options['Dumper'] = dumper
+    return ordered
+
+
+def _dump_yaml(model_class, data_type, data, binary, **options):
+    ordered = _yaml_options(binary, options)
     if model_class._islist:
+        mask = _popmask(model_class.__model__, options)
         _data = []
         for d in data or ():
-            _data.append(_to_dict(model_class, data_type, d, ordered))
+            _data.append(_to_dict(model_class.__model__, data_type, d, ordered, mask))
     else:
-        _data = _to_dict(model_class, data_type, data, ordered)
-    dumper = options.get('Dumper') or Dumper
-    result = yaml.dump(_data, Dumper=dumper, **options)
-    return result
+        _data = _to_dict(model_class, data_type, data, ordered, _popmask(model_class, options))
+    return yaml.dump(_data, **options)
 
 
 def dump_yaml_str(model_class, data_type, data, **options):
-    if PY3 and 'encoding' in options:
-        options['encoding'] = None
-    return _dump_yaml(model_class, data_type, data, **options)
+    return _dump_yaml(model_class, data_type, data, False, **options)
 
 
 def dump_yaml_bytes(model_class, data_type, data, **options):
-    if options.get('encoding') is None:
-        options['encoding'] = 'utf-8'
-    return _dump_yaml(model_class, data_type, data, **options)
+    return _dump_yaml(model_class, data_type, data, True, **options)
 
 
-def load_yaml(model_class, data_type, data, **options):
-    if PY3 and isinstance(data, bytes):
+def _decode_yaml(data, options):
+    buffer = _getbuffer(data)
+    if buffer is not None:
+        data = codecs.decode(buffer, options.get('encoding', 'utf-8'))
+    elif PY3 and isinstance(data, bytes):
         encoding = options.get('encoding', 'utf-8')
         data = data.decode(encoding)
-    loader = options.get('Loader', Loader)
-    forcekey = options.get('forcekey', False)
     try:
-        data = yaml.load(data, loader)
+        return yaml.load(data, options.get('Loader', Loader))
     except ParserError as e:
         raise_with_inner(ParseError, e)
+
+
+def load_yaml(model_class, data_type, data, **options):
+    forcekey = options.get('forcekey', False)
+    entity = options.get('entity')
+    into = options.get('into')
+    data = _decode_yaml(data, options)
+    entity_class = model_class.__model__ if model_class._islist else model_class
+    plan = entity_class._getparseplan(data_type, forcekey, entity, _getmask(entity_class, options.get('fields')))
+    parse = _lazyparser(_parse_entity, entity_class, plan) if options.get('lazy') else _parse_entity
+    plan = _withfactory(plan, into)
     if model_class._islist:
-        result = []
-        for d in data:
-            entity = _parse_dict(model_class, data_type, d, forcekey)
-            result.append(entity)
-        return result
+        if not isinstance(data, list):
+            raise FormatError()
+        return [parse(plan, d) for d in data]
     else:
-        return _parse_dict(model_class, data_type, data, forcekey)
+        return parse(plan, data)
@@ -0,0 +1,138 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import gc
+import sys
+import json
+import time
+import platform
+
+from mbserializer import Serializer
+from mbserializer.benchmarks.models import SHAPES, generate
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    _timer = time.perf_counter
+except AttributeError:
+    _timer = time.time
+
+DATA_TYPES = ('json/str', 'json/bytes', 'xml/str', 'xml/bytes', 'yaml/str', 'yaml/bytes',)
+
+
+def _measure(func, number, repeat):
+    func()
+    best = None
+    gcenabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = _timer()
+            for _ in range(number):
+                func()
+            elapsed = (_timer() - start) / number
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if gcenabled:
+            gc.enable()
+    return best
+
+
+def _peak_memory(func):
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(shapes=None, data_types=None, scale=1.0, number=10, repeat=3, seed=0, memory=True):
+    results = []
+    for shape, _, _, _ in SHAPES:
+        if shapes and shape not in shapes:
+            continue
+        model_class, data, fields = generate(shape, scale, seed)
+        serializer = Serializer(model_class)
+        for data_type in data_types or DATA_TYPES:
+            try:
+                text = serializer.dumps(data, data_type=data_type)
+            except KeyError:
+                continue
+            operations = (
+                ('dumps', lambda: serializer.dumps(data, data_type=data_type),),
+                ('loads', lambda: serializer.loads(text, data_type=data_type),),
+            )
+            for operation, func in operations:
+                elapsed = _measure(func, number, repeat)
+                results.append({
+                    'shape': shape,
+                    'data_type': data_type,
+                    'operation': operation,
+                    'fields': fields,
+                    'size': len(text),
+                    'ops_per_sec': 1.0 / elapsed,
+                    'ns_per_field': elapsed * 1e9 / fields,
+                    'peak_memory': _peak_memory(func) if memory else None,
+                })
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'options': {'scale': scale, 'number': number, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+def _key(result):
+    return result['shape'], result['data_type'], result['operation']
+
+
+def compare(baseline, current):
+    rows = []
+    baseline = dict((_key(r), r) for r in baseline['results'])
+    for result in current['results']:
+        base = baseline.get(_key(result))
+        if base is None:
+            continue
+        rows.append(_key(result) + (result['ops_per_sec'] / base['ops_per_sec'],))
+    return rows
+
+
+def main(args=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m mbserializer.benchmarks',
+                                     description='benchmark mbserializer dumps and loads.')
+    parser.add_argument('-s', '--shape', action='append', dest='shapes', help='shape to run (repeatable)')
+    parser.add_argument('-t', '--data-type', action='append', dest='data_types', help='data type to run (repeatable)')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for list lengths')
+    parser.add_argument('-n', '--number', type=int, default=10, help='calls per timing round')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timing rounds, the best one is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_false', dest='memory', help='skip peak memory measurement')
+    parser.add_argument('-o', '--output', help='write results as json to this file instead of stdout')
+    parser.add_argument('-c', '--compare', help='compare ops/sec with a previous json result file')
+    options = parser.parse_args(args)
+
+    result = run(options.shapes, options.data_types, options.scale, options.number, options.repeat,
+                 options.seed, options.memory)
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as fp:
+            fp.write(text)
+    else:
+        sys.stdout.write(text + '\n')
+    if options.compare:
+        with open(options.compare) as fp:
+            baseline = json.load(fp)
+        for shape, data_type, operation, ratio in compare(baseline, result):
+            sys.stderr.write('{0:<10} {1:<12} {2:<6} {3:>7.2f}x\n'.format(shape, data_type, operation, ratio))
@@ -0,0 +1,7 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+from mbserializer.benchmarks import main
+
+main()
@@ -0,0 +1,143 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import random
+
+from decimal import Decimal
+from datetime import datetime, date, timedelta
+from mbserializer import Model
+from mbserializer.fields import attribute_fields as attrs, element_fields as elems, list_fields as lists, \
+    text_fields as texts
+
+try:
+    import pytz
+
+    UTC = pytz.utc
+except ImportError:
+    UTC = None
+
+WIDE_FIELD_COUNT = 60
+DEEP_LEVEL_COUNT = 12
+
+_element_types = (
+    (elems.Str, lambda r: 'value-{0}'.format(r.randint(0, 1000000))),
+    (elems.Int, lambda r: r.randint(-1000000, 1000000)),
+    (elems.Float, lambda r: r.uniform(-1000, 1000)),
+    (elems.Bool, lambda r: r.random() < 0.5),
+    (elems.Decimal, lambda r: Decimal(r.randint(0, 10 ** 8)) / 100),
+    (elems.Datetime, lambda r: datetime(2015, 1, 1, tzinfo=UTC) + timedelta(seconds=r.randint(0, 10 ** 8))),
+)
+
+
+def _model(name, fields):
+    return type(Model)(name, (Model,), dict(fields, __tag__=name.lower()))
+
+
+Wide = _model('Wide', (('field{0:02d}'.format(i), _element_types[i % len(_element_types)][0]())
+                       for i in range(WIDE_FIELD_COUNT)))
+
+Deep = _model('Level{0:02d}'.format(DEEP_LEVEL_COUNT), (('name', elems.Str()), ('value', elems.Int()),))
+for _i in range(DEEP_LEVEL_COUNT - 1, -1, -1):
+    Deep = _model('Level{0:02d}'.format(_i), (
+        ('name', elems.Str()), ('value', elems.Int()), ('child', elems.Delegate(Deep)),))
+
+
+class Item(Model):
+    __tag__ = 'item'
+
+    id = elems.Int()
+    name = elems.Str()
+    price = elems.Decimal()
+    available = elems.Bool()
+    tags = lists.Str('tag', nested=True)
+
+
+class Catalog(Model):
+    __tag__ = 'catalog'
+
+    name = elems.Str()
+    updated = elems.Datetime()
+    items = lists.Delegate(Item, nested=True)
+
+
+class Record(Model):
+    __tag__ = 'record'
+    __xmlns__ = 'http://mbserializer.com/benchmarks/record'
+
+    text = texts.Str()
+    id = attrs.Int()
+    name = attrs.Str()
+    kind = attrs.Enum(('a', 'b', 'c',))
+    score = attrs.Float()
+    amount = attrs.Decimal()
+    active = attrs.Bool()
+    created = attrs.Datetime()
+    birthday = attrs.Date()
+
+
+class Records(Model):
+    __tag__ = 'records'
+    __xmlns__ = 'http://mbserializer.com/benchmarks/records'
+
+    records = lists.Delegate(Record)
+
+
+def wide(r, size):
+    return dict(('field{0:02d}'.format(i), _element_types[i % len(_element_types)][1](r))
+                for i in range(WIDE_FIELD_COUNT)), WIDE_FIELD_COUNT
+
+
+def deep(r, size):
+    data = {'name': 'leaf', 'value': r.randint(0, 1000)}
+    for i in range(DEEP_LEVEL_COUNT):
+        data = {'name': 'level-{0}'.format(i), 'value': r.randint(0, 1000), 'child': data}
+    return data, (DEEP_LEVEL_COUNT + 1) * 3 - 1
+
+
+def catalog(r, size):
+    items = []
+    for i in range(size):
+        items.append({
+            'id': i,
+            'name': 'item-{0}'.format(i),
+            'price': Decimal(r.randint(0, 10 ** 6)) / 100,
+            'available': r.random() < 0.5,
+            'tags': ['tag-{0}'.format(r.randint(0, 100)) for _ in range(3)],
+        })
+    data = {'name': 'catalog', 'updated': datetime(2015, 1, 1, tzinfo=UTC), 'items': items}
+    return data, 3 + size * 8
+
+
+def records(r, size):
+    kinds = ('a', 'b', 'c',)
+    items = []
+    for i in range(size):
+        items.append({
+            'text': 'record-{0}'.format(i),
+            'id': i,
+            'name': 'name-{0}'.format(r.randint(0, 1000)),
+            'kind': kinds[i % 3],
+            'score': r.uniform(0, 100),
+            'amount': Decimal(r.randint(0, 10 ** 6)) / 100,
+            'active': r.random() < 0.5,
+            'created': datetime(2015, 1, 1, tzinfo=UTC) + timedelta(seconds=r.randint(0, 10 ** 8)),
+            'birthday': date(1980, 1, 1) + timedelta(days=r.randint(0, 10000)),
+        })
+    return {'records': items}, 1 + size * 9
+
+
+SHAPES = (
+    ('wide', Wide, wide, 1,),
+    ('deep', Deep, deep, 1,),
+    ('catalog', Catalog, catalog, 1000,),
+    ('records', Records, records, 200,),
+)
+
+
+def generate(shape, scale=1.0, seed=0):
+    for name, model_class, generator, size in SHAPES:
+        if name == shape:
+            data, fields = generator(random.Random(seed), max(1, int(size * scale)))
+            return model_class, data, fields
+    raise ValueError('unknown shape: {0}'.format(shape))
@@ -5,13 +5,32 @@ __author__ = 'Junki Ishida'
 from ._compat import str_types, int_types, int_or_float_types, raise_with_inner, PY2
 from .exceptions import FormatError
 from decimal import Decimal
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+
+import re
+import time
+
+try:
+    from datetime import timezone as _timezone
+except ImportError:
+    _timezone = None
 
 try:
     import dateutil.parser
+    import dateutil.tz
 except ImportError:
     pass
 
+ISO_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+ISO_DATE_FORMAT = '%Y-%m-%d'
+
+RE_ISO_DATETIME = re.compile(r'([1-9][0-9]{3})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})'
+                             r'(Z|([+-])([0-9]{2}):?([0-5][0-9]))\Z')
+RE_ISO_DATE = re.compile(r'([1-9][0-9]{3})-([0-9]{2})-([0-9]{2})\Z')
+
+_TZ_CACHE_SIZE = 256
+_flexible_tzcache = {}
+
 
 def str_to_str(value):
     if isinstance(value, str_types):
@@ -63,6 +82,31 @@ def str_to_decimal(value):
     raise FormatError()
 
 
+def str_or_number_to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, str_types):
+        return Decimal(value)
+    if isinstance(value, int_types) and not isinstance(value, bool):
+        return Decimal(value)
+    raise FormatError()
+
+
+_decimal_only = set((Decimal,))
+_decimal_item_types = frozenset(str_types + int_types + (Decimal,))
+
+
+def str_or_number_list_to_decimal_list(values):
+    if values is None:
+        return []
+    types = set(map(type, values))
+    if types == _decimal_only:
+        return list(values)
+    if _decimal_item_types.issuperset(types):
+        return list(map(Decimal, values))
+    return [str_or_number_to_decimal(v) for v in values]
+
+
 def str_to_bool(value):
     if isinstance(value, str_types):
         value = value.lower()
@@ -105,9 +149,17 @@ def int_or_float_to_str(value):
     raise FormatError()
 
 
+def number_to_float(value):
+    if isinstance(value, float):
+        return value
+    if isinstance(value, int_types) or isinstance(value, Decimal):
+        return float(value)
+    raise FormatError()
+
+
 def float_to_decimal(value):
     if isinstance(value, float):
-        return Decimal(str(float))
+        return Decimal(repr(value))
     raise FormatError()
 
 
@@ -115,7 +167,7 @@ def int_or_float_to_decimal(value):
     if isinstance(value, int_types):
         return Decimal(value)
     if isinstance(value, float):
-        return Decimal(str(float))
+        return Decimal(repr(value))
     raise FormatError()
 
 
@@ -163,6 +215,82 @@ def datetime_to_str(value, format, timezone, flexible):
     return value.strftime(format)
 
 
+def _strict_tzinfo(zone, sign, hours, minutes):
+    if zone == 'Z':
+        return _timezone.utc
+    offset = timedelta(hours=int(hours), minutes=int(minutes))
+    return _timezone(-offset if sign == '-' else offset)
+
+
+def _flexible_tzinfo(zone):
+    # dateutil picks tzlocal() or tzutc() depending on the local zone, so ask it once per suffix
+    # and only reuse the answer when it does not depend on the date.
+    tzinfo = _flexible_tzcache.get(zone)
+    if tzinfo is None:
+        tzinfo = dateutil.parser.parse('2000-01-01T00:00:00' + zone).tzinfo
+        fixed = isinstance(tzinfo, (dateutil.tz.tzutc, dateutil.tz.tzoffset,))
+        if not (fixed or isinstance(tzinfo, dateutil.tz.tzlocal) and not time.daylight):
+            tzinfo = False
+        if len(_flexible_tzcache) < _TZ_CACHE_SIZE:
+            _flexible_tzcache[zone] = tzinfo
+    return tzinfo
+
+
+def _parse_isodatetime(value, flexible):
+    match = RE_ISO_DATETIME.match(value)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, zone, sign, hours, minutes = match.groups()
+    try:
+        if flexible:
+            tzinfo = _flexible_tzinfo(zone)
+        elif _timezone is not None:
+            tzinfo = _strict_tzinfo(zone, sign, hours, minutes)
+        else:
+            return None
+        if not tzinfo:
+            return None
+        return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second), tzinfo=tzinfo)
+    except ValueError:
+        return None
+
+
+def str_to_isodatetime(value, format, timezone, flexible):
+    result = _parse_isodatetime(value, flexible) if isinstance(value, str_types) else None
+    if result is None:
+        return str_to_datetime(value, format, timezone, flexible)
+    if timezone:
+        try:
+            return result.astimezone(timezone)
+        except ValueError as e:
+            raise_with_inner(FormatError, e)
+    return result
+
+
+def datetime_to_isostr(value, format, timezone, flexible):
+    if not isinstance(value, datetime):
+        raise FormatError()
+    if timezone:
+        try:
+            value = value.astimezone(timezone)
+        except ValueError as e:
+            raise_with_inner(FormatError, e)
+    if value.year < 1000:
+        return value.strftime(format)
+    offset = value.utcoffset()
+    if offset is None:
+        zone = ''
+    else:
+        seconds = offset.days * 86400 + offset.seconds
+        if offset.microseconds or seconds % 60:
+            return value.strftime(format)
+        zone = '-' if seconds < 0 else '+'
+        seconds = abs(seconds)
+        zone += '{0:02d}{1:02d}'.format(seconds // 3600, seconds // 60 % 60)
+    return '{0:04d}-{1:02d}-{2:02d}T{3:02d}:{4:02d}:{5:02d}{6}'.format(
+        value.year, value.month, value.day, value.hour, value.minute, value.second, zone)
+
+
 def str_to_date(value, format):
     if not isinstance(value, str_types):
         raise FormatError()
@@ -179,6 +307,36 @@ def date_to_str(value, format):
     return value.strftime(format)
 
 
+def str_to_isodate(value, format):
+    match = RE_ISO_DATE.match(value) if isinstance(value, str_types) else None
+    if match is not None:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            pass
+    return str_to_date(value, format)
+
+
+def date_to_isostr(value, format):
+    if not isinstance(value, date):
+        raise FormatError()
+    if value.year < 1000:
+        return value.strftime(format)
+    return '{0:04d}-{1:02d}-{2:02d}'.format(value.year, value.month, value.day)
+
+
+list_converters = {
+    str_or_number_to_decimal: str_or_number_list_to_decimal_list,
+}
+
+iso_converters = {
+    (str_to_datetime, ISO_DATETIME_FORMAT,): str_to_isodatetime,
+    (datetime_to_str, ISO_DATETIME_FORMAT,): datetime_to_isostr,
+    (str_to_date, ISO_DATE_FORMAT,): str_to_isodate,
+    (date_to_str, ISO_DATE_FORMAT,): date_to_isostr,
+}
+
+
 def str_to_enum(value, values):
     if value not in values:
         raise FormatError()
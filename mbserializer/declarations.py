@@ -31,4 +31,162 @@ class Entity(dict):
         return 'Entity({0})'.format(dict.__repr__(self, *args, **kwargs))
 
 
-__all__ = ['NotExist', 'Entity', ]
\ No newline at end of file
+_UNRESOLVED = object()
+_ABSENT = object()
+_LAZY_METHODS = frozenset(('get', 'materialize', 'keys', 'values', 'items',))
+
+
+class LazyEntity(object):
+    __slots__ = ('_parse', '_plan', '_fields', '_data', '_values', '_entity',)
+
+    def __init__(self, parse, plan, fields, data):
+        self._parse = parse
+        self._plan = plan
+        self._fields = fields
+        self._data = data
+        self._values = {}
+        self._entity = None
+
+    def __resolve(self, name, error):
+        value = self._values.get(name, _UNRESOLVED)
+        if value is _UNRESOLVED and self._entity is None:
+            plan = self._fields.get(name)
+            if plan is not None:
+                value = self._values[name] = dict.get(self._parse(plan, self._data), name, _ABSENT)
+        if value is _UNRESOLVED or value is _ABSENT:
+            raise error(name)
+        return value
+
+    def __getattribute__(self, name):
+        # model fields take priority over the helper methods, as with Entity
+        if name in _LAZY_METHODS and name in object.__getattribute__(self, '_fields'):
+            return object.__getattribute__(self, '_LazyEntity__resolve')(name, AttributeError)
+        return object.__getattribute__(self, name)
+
+    def __getattr__(self, name):
+        if name in LazyEntity.__slots__:
+            raise AttributeError(name)
+        return self.__resolve(name, AttributeError)
+
+    def __getitem__(self, name):
+        return self.__resolve(name, KeyError)
+
+    def get(self, name, default=None):
+        try:
+            return self.__resolve(name, KeyError)
+        except KeyError:
+            return default
+
+    def materialize(self):
+        if self._entity is None:
+            factory, plan = self._plan
+            values = self._parse((None, plan,), self._data)
+            if factory is None:
+                self._entity = values
+            else:
+                kwargs = dict((entry[0], NotExist,) for entry in plan)
+                kwargs.update(values)
+                self._entity = factory(**kwargs)
+            self._values = dict(values)
+            self._data = None
+        return self._entity
+
+    def __contains__(self, name):
+        LazyEntity.materialize(self)
+        return name in self._values
+
+    def __iter__(self):
+        LazyEntity.materialize(self)
+        return iter(self._values)
+
+    def __len__(self):
+        LazyEntity.materialize(self)
+        return len(self._values)
+
+    def keys(self):
+        LazyEntity.materialize(self)
+        return self._values.keys()
+
+    def values(self):
+        LazyEntity.materialize(self)
+        return self._values.values()
+
+    def items(self):
+        LazyEntity.materialize(self)
+        return self._values.items()
+
+    def __eq__(self, other):
+        if isinstance(other, LazyEntity):
+            other = LazyEntity.materialize(other)
+        return LazyEntity.materialize(self) == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        values = ', '.join('{0!r}: {1!r}'.format(k, v) for k, v in self._values.items() if v is not _ABSENT)
+        return 'LazyEntity({{{0}}}{1})'.format(values, '' if self._entity is not None else ', ...')
+
+
+class SlotsEntity(object):
+    __slots__ = ()
+    __model__ = None
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return _load_slots_entity, (self.__model__, tuple(getattr(self, k) for k in self.__slots__),)
+
+    def __repr__(self):
+        return '{0}({1})'.format(type(self).__name__,
+                                 ', '.join('{0}={1!r}'.format(k, getattr(self, k)) for k in self.__slots__))
+
+
+def _slots_entity_class(model_class):
+    names = tuple(model_class._fields)
+    selfname = 'self'
+    while selfname in names:
+        selfname = '_' + selfname
+    lines = ['def __init__({0}):'.format(', '.join((selfname,) + names))]
+    lines.extend('    {0}.{1} = {1}'.format(selfname, k) for k in names)
+    if not names:
+        lines.append('    pass')
+    namespace = {}
+    exec('\n'.join(lines), namespace)
+    init = namespace['__init__']
+    init.__defaults__ = (NotExist,) * len(names)
+    attrs = {
+        '__slots__': names,
+        '__init__': init,
+        '__module__': model_class.__module__,
+        '__model__': model_class,
+    }
+    return type(model_class.__name__ + 'Entity', (SlotsEntity,), attrs)
+
+
+_slots_entity_classes = {}
+
+
+def _getslotsentityclass(model_class):
+    entity_class = _slots_entity_classes.get(model_class)
+    if entity_class is None:
+        entity_class = _slots_entity_classes.setdefault(model_class, _slots_entity_class(model_class))
+    return entity_class
+
+
+def _load_slots_entity(model_class, values):
+    return _getslotsentityclass(model_class)(*values)
+
+
+__all__ = ['NotExist', 'Entity', 'SlotsEntity', 'LazyEntity', ]
\ No newline at end of file
@@ -5,11 +5,11 @@ __author__ = 'Junki Ishida'
 
 class FormatError(ValueError):
     def __init__(self, *args, **kwargs):
+        self.inner = kwargs.pop('inner', None)
         super(FormatError, self).__init__(*args, **kwargs)
-        self.inner = kwargs.get('inner')
 
 
 class ParseError(ValueError):
     def __init__(self, *args, **kwargs):
-        super(FormatError, self).__init__(*args, **kwargs)
-        self.inner = kwargs.get('inner')
+        self.inner = kwargs.pop('inner', None)
+        super(ParseError, self).__init__(*args, **kwargs)
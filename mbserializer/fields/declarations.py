@@ -3,15 +3,29 @@
 __author__ = 'Junki Ishida'
 
 import pytz
-from .. import converters
+from functools import partial
+from .. import converters, utils
 from .._xml import _getxmlns
 from .._compat import str_types, iteritems
 
 import sys
+import itertools
+
+_data_type_ids = {}
+_data_type_counter = itertools.count()
+
+
+def _getdatatypeid(data_type):
+    data_type_id = _data_type_ids.get(data_type)
+    if data_type_id is None:
+        data_type_id = _data_type_ids.setdefault(data_type, next(_data_type_counter))
+    return data_type_id
+
 
 class FieldBase(object):
     _dump_converters = None
     _parse_converters = None
+    _converter_tables = None
     index = 0
     options = None
 
@@ -38,29 +52,65 @@ class FieldBase(object):
 
     @classmethod
     def register_dump_converter(cls, data_type, dump_converter):
-        if cls._dump_converters is None:
-            cls._dump_converters = {}
-        cls._dump_converters[data_type] = dump_converter
+        converters = dict(cls.__dict__.get('_dump_converters') or ())
+        converters[data_type] = dump_converter
+        _getdatatypeid(data_type)
+        cls._dump_converters = converters
+        utils._nextgeneration()
 
     @classmethod
     def register_parse_converter(cls, data_type, load_converter):
-        if cls._parse_converters is None:
-            cls._parse_converters = {}
-        cls._parse_converters[data_type] = load_converter
+        converters = dict(cls.__dict__.get('_parse_converters') or ())
+        converters[data_type] = load_converter
+        _getdatatypeid(data_type)
+        cls._parse_converters = converters
+        utils._nextgeneration()
 
     def _dump(self, value, data_type):
-        if self._dump_converters is not None:
-            converter = self._dump_converters.get(data_type)
-            if converter:
-                value = converter(value, **self.options) if self.options else converter(value)
-        return value
+        converter = self._getdumpconverter(data_type)
+        return converter(value) if converter else value
 
     def _parse(self, value, data_type):
-        if self._parse_converters is not None:
-            converter = self._parse_converters.get(data_type)
-            if converter:
-                value = converter(value, **self.options) if self.options else converter(value)
-        return value
+        converter = self._getparseconverter(data_type)
+        return converter(value) if converter else value
+
+    def _buildtable(self, name):
+        converters = {}
+        for klass in reversed(type(self).__mro__):
+            converters.update(klass.__dict__.get(name) or ())
+        table = [None] * len(_data_type_ids)
+        for data_type, converter in iteritems(converters):
+            data_type_id = _getdatatypeid(data_type)
+            if data_type_id >= len(table):
+                table.extend([None] * (data_type_id + 1 - len(table)))
+            table[data_type_id] = self._bindconverter(converter)
+        return tuple(table)
+
+    def _bindconverter(self, converter):
+        if not self.options:
+            return converter
+        converter = converters.iso_converters.get((converter, self.options.get('format'),), converter)
+        return partial(converter, **self.options)
+
+    def _gettables(self):
+        tables = self._converter_tables
+        generation = utils._generation
+        if tables is None or tables[0] != generation:
+            tables = self._converter_tables = (
+                generation, self._buildtable('_dump_converters'), self._buildtable('_parse_converters'),)
+        return tables
+
+    def _getconverter(self, table, data_type):
+        data_type_id = _data_type_ids.get(data_type)
+        if data_type_id is None or data_type_id >= len(table):
+            return None
+        return table[data_type_id]
+
+    def _getdumpconverter(self, data_type):
+        return self._getconverter(self._gettables()[1], data_type)
+
+    def _getparseconverter(self, data_type):
+        return self._getconverter(self._gettables()[2], data_type)
 
     def get_key(self, key, **options):
         return self.key or key
@@ -214,7 +264,8 @@ _register_converters(
                 converters.int_or_float_to_str: _xml_types,
             },
             'parse': {
-                converters.int_or_float_to_float: _json_types + _yaml_types,
+                converters.number_to_float: _json_types,
+                converters.int_or_float_to_float: _yaml_types,
                 converters.str_to_float: _xml_types,
             },
         },
@@ -233,7 +284,8 @@ _register_converters(
                 converters.decimal_to_str: _all_types,
             },
             'parse': {
-                converters.str_to_decimal: _all_types,
+                converters.str_or_number_to_decimal: _json_types,
+                converters.str_to_decimal: _xml_types + _yaml_types,
             },
         },
         DatetimeFieldMixin: {
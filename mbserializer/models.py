@@ -3,7 +3,10 @@
 __author__ = 'Junki Ishida'
 
 from .exceptions import FormatError
+from . import utils
+from .declarations import Entity, _getslotsentityclass
 from ._compat import iteritems, with_metaclass, OrderedDict
+from .utils import _compile_dump_plan, _compile_parse_plan
 
 
 class ModelTypeBase(type):
@@ -39,10 +42,45 @@ def _setfields(fields, attrs):
         fields[k] = v
 
 
+def _getplan(cls, key, compile_plan, *args):
+    if cls._generation != utils._generation:
+        cls._plans = {}
+        cls._generation = utils._generation
+    if utils._instrumented:
+        stats = utils._getstats()
+        if stats is not None:
+            return stats._getplan(cls, key, compile_plan, *args)
+    plan = cls._plans.get(key)
+    if plan is None:
+        plan = cls._plans.setdefault(key, compile_plan(cls, *args))
+    return plan
+
+
+def _getdumpplan(cls, data_type, mask=None):
+    return cls._getplan(('dump', data_type, mask,), _compile_dump_plan, data_type, mask)
+
+
+def _getparseplan(cls, data_type, forcekey, entity=None, mask=None):
+    forcekey = bool(forcekey)
+    entity = entity or 'dict'
+    return cls._getplan(('parse', data_type, forcekey, entity, mask,), _compile_parse_plan, data_type, forcekey,
+                        entity, mask)
+
+
+def _getentityclass(cls, entity):
+    if cls.__entity__ is not None:
+        return cls.__entity__
+    if entity is None or entity == 'dict':
+        return Entity
+    if entity == 'slots':
+        return _getslotsentityclass(cls)
+    raise ValueError('unknown entity type: {0}'.format(entity))
+
+
 class ModelType(ModelTypeBase):
     def __new__(cls, name, bases, attrs):
         def _getxmlnsset(cls):
-            if not hasattr(cls, '_MLModelType__xmlnsset'):
+            if '_ModelType__xmlnsset' not in cls.__dict__:
                 xmlnsset = set()
                 if cls.__xmlns__ is not None:
                     xmlnsset.add(cls.__xmlns__)
@@ -66,6 +104,12 @@ class ModelType(ModelTypeBase):
         _setfields(__fields, attrs)
         attrs['_fields'] = __fields
         attrs['_getxmlnsset'] = classmethod(_getxmlnsset)
+        attrs['_plans'] = {}
+        attrs['_generation'] = utils._generation
+        attrs['_getplan'] = classmethod(_getplan)
+        attrs['_getdumpplan'] = classmethod(_getdumpplan)
+        attrs['_getparseplan'] = classmethod(_getparseplan)
+        attrs['_getentityclass'] = classmethod(_getentityclass)
         return super(ModelType, cls).__new__(cls, name, bases, attrs)
 
 
@@ -81,6 +125,7 @@ class ListModelType(ModelTypeBase):
 class Model(with_metaclass(ModelType)):
     __xmlns__ = None
     __tag__ = None
+    __entity__ = None
 
 
 class ListModel(with_metaclass(ListModelType)):
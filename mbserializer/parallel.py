@@ -0,0 +1,145 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+from functools import partial
+from itertools import islice
+
+from .serializer import Serializer
+from .utils import _dump_dict, _parse_entity, _withfactory, _getmask, _popmask
+from ._json import _json_item_encoder, _decode_json, _decimal_options, get_json_backend, StdlibJsonBackend
+from ._yaml import yaml_loaded
+from ._compat import PY2, DICT_ORDERED
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+
+    futures_loaded = True
+except ImportError:
+    futures_loaded = False
+
+if yaml_loaded:
+    import yaml
+    from ._yaml import _yaml_options, _decode_yaml
+
+_parallel_types = {
+    'json': ('json', False,),
+    'json/str': ('json', False,),
+    'json/bytes': ('json', True,),
+}
+
+if yaml_loaded:
+    _parallel_types.update({
+        'yaml': ('yaml', False,),
+        'yaml/str': ('yaml', False,),
+        'yaml/bytes': ('yaml', True,),
+    })
+
+
+def _chunks(data, chunk_size):
+    data = iter(data or ())
+    while True:
+        chunk = list(islice(data, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _encode_json_items(model_class, data_type, options, items):
+    encode, item_separator, newline = _json_item_encoder(model_class, data_type, dict(options))
+    return (item_separator + newline).join([encode(d) for d in items])
+
+
+def _dump_items(model_class, data_type, ordered, mask, items):
+    plan = model_class.__model__._getdumpplan(data_type, mask)
+    return [_dump_dict(plan, d, ordered) for d in items]
+
+
+def _parse_items(model_class, data_type, forcekey, entity, mask, into, items):
+    plan = _withfactory(model_class.__model__._getparseplan(data_type, forcekey, entity, mask), into)
+    return [_parse_entity(plan, d) for d in items]
+
+
+class ParallelSerializer(Serializer):
+    def __init__(self, model_class, default_data_type='json', workers=None, chunk_size=1000, executor=None,
+                 *args, **kwargs):
+        super(ParallelSerializer, self).__init__(model_class, default_data_type, *args, **kwargs)
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive.')
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self._shutdown = executor is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._shutdown and self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def _map(self, func, data):
+        if self.executor is None:
+            if not futures_loaded:
+                raise ImportError('concurrent.futures is required for ParallelSerializer.')
+            self.executor = ProcessPoolExecutor(self.workers)
+        return list(self.executor.map(func, _chunks(data, self.chunk_size)))
+
+    def dumps(self, data, data_type=None, **options):
+        data_type = self.default_data_type if data_type is None else data_type
+        parallel_type = _parallel_types.get(data_type)
+        if parallel_type is None or not self.model_class._islist:
+            return super(ParallelSerializer, self).dumps(data, data_type, **options)
+        self._setdefaults(data_type, options)
+        family, binary = parallel_type
+        if family == 'yaml':
+            ordered = _yaml_options(binary, options)
+            mask = _popmask(self.model_class.__model__, options)
+            items = []
+            for chunk in self._map(partial(_dump_items, self.model_class, data_type, ordered, mask), data):
+                items.extend(chunk)
+            return yaml.dump(items, **options)
+        options.pop('direct', None)
+        backend = get_json_backend(options.pop('backend', None))
+        if not isinstance(backend, StdlibJsonBackend):
+            ordered = options.pop('ordered', True) and not DICT_ORDERED
+            mask = _popmask(self.model_class.__model__, options)
+            items = []
+            for chunk in self._map(partial(_dump_items, self.model_class, data_type, ordered, mask), data):
+                items.extend(chunk)
+            return backend.dumpb(items, **options) if binary else backend.dumps(items, **options)
+        _, item_separator, newline = _json_item_encoder(self.model_class, data_type, dict(options))
+        chunks = self._map(partial(_encode_json_items, self.model_class, data_type, options), data)
+        if chunks:
+            result = '[' + newline + (item_separator + newline).join(chunks) + ('\n]' if newline else ']')
+        else:
+            result = '[]'
+        if binary and not (PY2 and isinstance(result, bytes)):
+            return result.encode('utf-8')
+        return result
+
+    def loads(self, data, data_type=None, **options):
+        data_type = self.default_data_type if data_type is None else data_type
+        parallel_type = _parallel_types.get(data_type)
+        if parallel_type is None or not self.model_class._islist or options.get('lazy'):
+            return super(ParallelSerializer, self).loads(data, data_type, **options)
+        self._setdefaults(data_type, options)
+        forcekey = options.pop('forcekey', False)
+        entity = options.pop('entity', None)
+        into = options.pop('into', None)
+        mask = _getmask(self.model_class.__model__, options.pop('fields', None))
+        if parallel_type[0] == 'yaml':
+            data = _decode_yaml(data, options)
+        else:
+            data = _decode_json(get_json_backend(options.pop('backend', None)), data, _decimal_options(options))
+        result = []
+        for chunk in self._map(partial(_parse_items, self.model_class, data_type, forcekey, entity, mask, into), data):
+            result.extend(chunk)
+        return result
+
+
+__all__ = ['ParallelSerializer', ]
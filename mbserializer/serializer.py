@@ -2,18 +2,38 @@
 
 __author__ = 'Junki Ishida'
 
-from ._json import dump_json_str, dump_json_bytes, load_json
-from ._xml import lxml_loaded, defusedxml_loaded, dump_xml_str, dump_xml_bytes, load_xml
+from ._json import dump_json_str, dump_json_bytes, iterdump_json_str, iterdump_json_bytes, load_json, \
+    iterload_json, get_json_backend, json_str_dumper, json_bytes_dumper, json_loader, json_parser
+from ._xml import lxml_loaded, defusedxml_loaded, dump_xml_str, dump_xml_bytes, iterdump_xml_str, \
+    iterdump_xml_bytes, load_xml, iterload_xml, xml_str_dumper, xml_bytes_dumper, xml_loader, xml_parser
 from ._yaml import yaml_loaded, dump_yaml_str, dump_yaml_bytes, load_yaml
+from .utils import _BufferedParser
+from .stats import Stats
+from ._compat import str_types, ASYNC
+
+import os
+import mmap
 
 
 class Serializer(object):
     __load_funcs = {}
     __dump_funcs = {}
+    __iterdump_funcs = {}
+    __iterload_funcs = {}
+    __loader_funcs = {}
+    __dumper_funcs = {}
+    __parser_funcs = {}
 
     def __init__(self, model_class, default_data_type='json', *args, **kwargs):
         self.model_class = model_class
         self.default_data_type = default_data_type
+        json_backend = kwargs.get('json_backend')
+        self.json_backend = None if json_backend is None else get_json_backend(json_backend)
+        stats = kwargs.get('stats')
+        self.stats = None
+        if stats:
+            self.stats = stats if isinstance(stats, Stats) else Stats()
+            self.stats._bind(self)
 
     @classmethod
     def register_load_func(cls, data_type, load_func):
@@ -23,33 +43,183 @@ class Serializer(object):
     def register_dump_func(cls, data_type, dump_func):
         cls.__dump_funcs[data_type] = dump_func
 
+    @classmethod
+    def register_iterdump_func(cls, data_type, iterdump_func):
+        cls.__iterdump_funcs[data_type] = iterdump_func
+
+    @classmethod
+    def register_iterload_func(cls, data_type, iterload_func):
+        cls.__iterload_funcs[data_type] = iterload_func
+
+    @classmethod
+    def register_loader_func(cls, data_type, loader_func):
+        cls.__loader_funcs[data_type] = loader_func
+
+    @classmethod
+    def register_dumper_func(cls, data_type, dumper_func):
+        cls.__dumper_funcs[data_type] = dumper_func
+
+    @classmethod
+    def register_parser_func(cls, data_type, parser_func):
+        cls.__parser_funcs[data_type] = parser_func
+
+    def _setdefaults(self, data_type, options):
+        if self.json_backend is not None and data_type.split('/')[0] == 'json':
+            options.setdefault('backend', self.json_backend)
+
     def loads(self, data, data_type=None, **options):
         data_type = self.default_data_type if data_type is None else data_type
+        self._setdefaults(data_type, options)
         return self.__load_funcs[data_type](self.model_class, data_type, data, **options)
 
+    def iterload(self, data, data_type=None, **options):
+        data_type = self.default_data_type if data_type is None else data_type
+        iterload_func = self.__iterload_funcs.get(data_type)
+        if iterload_func is None:
+            result = self.loads(data, data_type, **options)
+            return iter(result if self.model_class._islist else (result,))
+        return iterload_func(self.model_class, data_type, data, **options)
+
     def dumps(self, data, data_type=None, **options):
         data_type = self.default_data_type if data_type is None else data_type
+        self._setdefaults(data_type, options)
         return self.__dump_funcs[data_type](self.model_class, data_type, data, **options)
 
+    def iterdump(self, data, data_type=None, **options):
+        data_type = self.default_data_type if data_type is None else data_type
+        iterdump_func = self.__iterdump_funcs.get(data_type)
+        if iterdump_func is None:
+            return iter((self.dumps(data, data_type, **options),))
+        return iterdump_func(self.model_class, data_type, data, **options)
+
+    def dump(self, data, fp, data_type=None, **options):
+        for chunk in self.iterdump(data, data_type, **options):
+            fp.write(chunk)
+
+    def load(self, fp, data_type=None, **options):
+        if not (isinstance(fp, str_types) or hasattr(fp, '__fspath__')):
+            return self.loads(fp, data_type, **options)
+        with open(fp, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.loads(b'', data_type, **options)
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return self.loads(buffer, data_type, **options)
+            finally:
+                try:
+                    buffer.close()
+                except BufferError:
+                    pass
+
+    def loader(self, data_type=None, **options):
+        data_type = self.default_data_type if data_type is None else data_type
+        self._setdefaults(data_type, options)
+        loader_func = self.__loader_funcs.get(data_type)
+        if loader_func is None:
+            load_func = self.__load_funcs[data_type]
+            return lambda data: load_func(self.model_class, data_type, data, **dict(options))
+        return loader_func(self.model_class, data_type, **options)
+
+    def dumper(self, data_type=None, **options):
+        data_type = self.default_data_type if data_type is None else data_type
+        self._setdefaults(data_type, options)
+        dumper_func = self.__dumper_funcs.get(data_type)
+        if dumper_func is None:
+            dump_func = self.__dump_funcs[data_type]
+            return lambda data: dump_func(self.model_class, data_type, data, **dict(options))
+        return dumper_func(self.model_class, data_type, **options)
+
+    def parser(self, data_type=None, **options):
+        data_type = self.default_data_type if data_type is None else data_type
+        self._setdefaults(data_type, options)
+        parser_func = self.__parser_funcs.get(data_type)
+        if parser_func is None:
+            return _BufferedParser(self.loader(data_type, **options), self.model_class._islist)
+        return parser_func(self.model_class, data_type, **options)
+
+    if ASYNC:
+        from ._async import aiterload, aload, adump
+
+    def loads_many(self, items, data_type=None, errors='raise', **options):
+        return _map(self.loader(data_type, **options), items, errors)
+
+    def dumps_many(self, items, data_type=None, errors='raise', **options):
+        return _map(self.dumper(data_type, **options), items, errors)
+
+
+def _map(func, items, errors):
+    if errors == 'raise':
+        return [func(item) for item in items]
+    if errors != 'collect':
+        raise ValueError('unknown errors mode: {0}'.format(errors))
+    results = []
+    for item in items:
+        try:
+            results.append(func(item))
+        except Exception as e:
+            results.append(e)
+    return results
+
 
 Serializer.register_dump_func('json', dump_json_str)
 Serializer.register_dump_func('json/str', dump_json_str)
 Serializer.register_dump_func('json/bytes', dump_json_bytes)
 
+Serializer.register_iterdump_func('json', iterdump_json_str)
+Serializer.register_iterdump_func('json/str', iterdump_json_str)
+Serializer.register_iterdump_func('json/bytes', iterdump_json_bytes)
+
+Serializer.register_dumper_func('json', json_str_dumper)
+Serializer.register_dumper_func('json/str', json_str_dumper)
+Serializer.register_dumper_func('json/bytes', json_bytes_dumper)
+
 Serializer.register_load_func('json', load_json)
 Serializer.register_load_func('json/str', load_json)
 Serializer.register_load_func('json/bytes', load_json)
 
+Serializer.register_iterload_func('json', iterload_json)
+Serializer.register_iterload_func('json/str', iterload_json)
+Serializer.register_iterload_func('json/bytes', iterload_json)
+
+Serializer.register_loader_func('json', json_loader)
+Serializer.register_loader_func('json/str', json_loader)
+Serializer.register_loader_func('json/bytes', json_loader)
+
+Serializer.register_parser_func('json', json_parser)
+Serializer.register_parser_func('json/str', json_parser)
+Serializer.register_parser_func('json/bytes', json_parser)
+
 if lxml_loaded:
     Serializer.register_dump_func('xml', dump_xml_str)
     Serializer.register_dump_func('xml/str', dump_xml_str)
     Serializer.register_dump_func('xml/bytes', dump_xml_bytes)
 
+    Serializer.register_iterdump_func('xml', iterdump_xml_str)
+    Serializer.register_iterdump_func('xml/str', iterdump_xml_str)
+    Serializer.register_iterdump_func('xml/bytes', iterdump_xml_bytes)
+
+    Serializer.register_dumper_func('xml', xml_str_dumper)
+    Serializer.register_dumper_func('xml/str', xml_str_dumper)
+    Serializer.register_dumper_func('xml/bytes', xml_bytes_dumper)
+
 if defusedxml_loaded:
     Serializer.register_load_func('xml', load_xml)
     Serializer.register_load_func('xml/str', load_xml)
     Serializer.register_load_func('xml/bytes', load_xml)
 
+    Serializer.register_loader_func('xml', xml_loader)
+    Serializer.register_loader_func('xml/str', xml_loader)
+    Serializer.register_loader_func('xml/bytes', xml_loader)
+
+if lxml_loaded:
+    Serializer.register_iterload_func('xml', iterload_xml)
+    Serializer.register_iterload_func('xml/str', iterload_xml)
+    Serializer.register_iterload_func('xml/bytes', iterload_xml)
+
+    Serializer.register_parser_func('xml', xml_parser)
+    Serializer.register_parser_func('xml/str', xml_parser)
+    Serializer.register_parser_func('xml/bytes', xml_parser)
+
 if yaml_loaded:
     Serializer.register_dump_func('yaml', dump_yaml_str)
     Serializer.register_dump_func('yaml/str', dump_yaml_str)
@@ -0,0 +1,197 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import threading
+
+from timeit import default_timer
+
+from . import utils
+from .utils import _getbuffer
+from ._compat import str_types, iteritems
+
+
+def _size(data):
+    if isinstance(data, (bytes,) + str_types):
+        return len(data)
+    buffer = _getbuffer(data)
+    return 0 if buffer is None else buffer.nbytes
+
+
+class _StatsParser(object):
+    def __init__(self, stats, model_class, data_type, parser):
+        self.stats = stats
+        self.model_class = model_class
+        self.data_type = data_type
+        self.parser = parser
+        self.elapsed = 0
+        self.bytes_in = 0
+
+    def feed(self, chunk):
+        items, elapsed = self.stats._call(self.parser.feed, chunk)
+        self.elapsed += elapsed
+        self.bytes_in += _size(chunk)
+        return items
+
+    def close(self):
+        items, elapsed = self.stats._call(self.parser.close)
+        self.stats._add(self.model_class, self.data_type, self.elapsed + elapsed, self.bytes_in, 0)
+        return items
+
+
+class Stats(object):
+    def __init__(self, callback=None):
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._models = {}
+        self._fields = {}
+        self._data_types = {}
+        self._plans = {}
+        self._generation = utils._generation
+
+    def _getplan(self, model_class, key, compile_plan, *args):
+        if self._generation != utils._generation:
+            self._plans = {}
+            self._generation = utils._generation
+        key = (model_class, key,)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans.setdefault(key, compile_plan(model_class, *args))
+        return plan
+
+    def _record(self, table, key, size):
+        record = table.get(key)
+        if record is None:
+            with self._lock:
+                record = table.setdefault(key, [0] * size)
+        return record
+
+    def _timer(self, model_class, name, func):
+        record = self._record(self._fields, '{0}.{1}'.format(model_class.__name__, name), 2)
+
+        def timed(value):
+            start = default_timer()
+            try:
+                return func(value)
+            finally:
+                elapsed = default_timer() - start
+                with self._lock:
+                    record[0] += 1
+                    record[1] += elapsed
+
+        return timed
+
+    def _add(self, model_class, data_type, elapsed, bytes_in, bytes_out):
+        model = self._record(self._models, model_class.__name__, 2)
+        record = self._record(self._data_types, data_type, 4)
+        with self._lock:
+            model[0] += 1
+            model[1] += elapsed
+            record[0] += 1
+            record[1] += elapsed
+            record[2] += bytes_in
+            record[3] += bytes_out
+
+    def _call(self, func, *args, **kwargs):
+        previous = utils._setstats(self)
+        start = default_timer()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            utils._setstats(previous)
+        return result, default_timer() - start
+
+    def _run(self, model_class, data_type, bytes_in, dump, func, *args, **kwargs):
+        if utils._getstats() is self:
+            return func(*args, **kwargs)
+        result, elapsed = self._call(func, *args, **kwargs)
+        self._add(model_class, data_type, elapsed, bytes_in, _size(result) if dump else 0)
+        return result
+
+    def _iterate(self, model_class, data_type, bytes_in, dump, func, *args, **kwargs):
+        iterator, elapsed = self._call(lambda: iter(func(*args, **kwargs)))
+        bytes_out = 0
+        try:
+            while True:
+                item, _elapsed = self._call(next, iterator, utils._MISSING)
+                elapsed += _elapsed
+                if item is utils._MISSING:
+                    break
+                if dump:
+                    bytes_out += _size(item)
+                yield item
+        finally:
+            self._add(model_class, data_type, elapsed, bytes_in, bytes_out)
+
+    def _bind(self, serializer):
+        loads = serializer.loads
+        dumps = serializer.dumps
+        iterload = serializer.iterload
+        iterdump = serializer.iterdump
+        loader = serializer.loader
+        dumper = serializer.dumper
+        parser = serializer.parser
+        model_class = serializer.model_class
+
+        def _data_type(data_type):
+            return serializer.default_data_type if data_type is None else data_type
+
+        def _loads(data, data_type=None, **options):
+            return self._run(model_class, _data_type(data_type), _size(data), False, loads, data, data_type,
+                             **options)
+
+        def _dumps(data, data_type=None, **options):
+            return self._run(model_class, _data_type(data_type), 0, True, dumps, data, data_type, **options)
+
+        def _iterload(data, data_type=None, **options):
+            return self._iterate(model_class, _data_type(data_type), _size(data), False, iterload, data, data_type,
+                                 **options)
+
+        def _iterdump(data, data_type=None, **options):
+            return self._iterate(model_class, _data_type(data_type), 0, True, iterdump, data, data_type, **options)
+
+        def _loader(data_type=None, **options):
+            data_type = _data_type(data_type)
+            load = self._call(loader, data_type, **options)[0]
+            return lambda data: self._run(model_class, data_type, _size(data), False, load, data)
+
+        def _dumper(data_type=None, **options):
+            data_type = _data_type(data_type)
+            dump = self._call(dumper, data_type, **options)[0]
+            return lambda data: self._run(model_class, data_type, 0, True, dump, data)
+
+        def _parser(data_type=None, **options):
+            data_type = _data_type(data_type)
+            return _StatsParser(self, model_class, data_type, self._call(parser, data_type, **options)[0])
+
+        serializer.loads = _loads
+        serializer.dumps = _dumps
+        serializer.iterload = _iterload
+        serializer.iterdump = _iterdump
+        serializer.loader = _loader
+        serializer.dumper = _dumper
+        serializer.parser = _parser
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'models': dict((k, {'count': v[0], 'time': v[1]}) for k, v in iteritems(self._models)),
+                'fields': dict((k, {'count': v[0], 'time': v[1]}) for k, v in iteritems(self._fields)),
+                'data_types': dict((k, {'count': v[0], 'time': v[1], 'bytes_in': v[2], 'bytes_out': v[3]})
+                                   for k, v in iteritems(self._data_types)),
+            }
+
+    def reset(self):
+        with self._lock:
+            for table in (self._models, self._fields, self._data_types):
+                for record in table.values():
+                    record[:] = [0] * len(record)
+
+    def export(self, callback=None):
+        callback = callback or self.callback
+        if callback is None:
+            raise ValueError('callback is required.')
+        return callback(self.snapshot())
+
+
+__all__ = ['Stats', ]
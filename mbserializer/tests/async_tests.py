@@ -0,0 +1,100 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, pytz
+
+from decimal import Decimal
+from datetime import datetime
+from mbserializer.tests import models
+from mbserializer import Serializer
+from mbserializer.exceptions import ParseError
+from mbserializer._compat import ASYNC
+
+if ASYNC:
+    import asyncio
+
+
+class _Chunks(object):
+    def __init__(self, loop, chunks):
+        self.loop = loop
+        self.chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        future = self.loop.create_future()
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            future.set_exception(StopAsyncIteration())
+        else:
+            future.set_result(chunk)
+        return future
+
+
+class _Writer(object):
+    def __init__(self):
+        self.chunks = []
+        self.drained = 0
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+
+    def drain(self):
+        self.drained += 1
+        return asyncio.sleep(0)
+
+
+@unittest.skipIf(not ASYNC, 'async generators are not supported')
+class AsyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.children = [
+            {
+                'int_text': i,
+                'str_elem': 'str{0}'.format(i),
+                'int_elem': i * 2,
+                'float_elem': 1.5,
+                'decimal_elem': Decimal('1.25'),
+                'bool_elem': i % 2 == 0,
+                'datetime_elem': datetime(2015, 1, 5, 8, 30, tzinfo=pytz.utc),
+            } for i in range(10)
+        ]
+        self.serializer = Serializer(models.Children)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _stream(self, data):
+        reader = asyncio.StreamReader(loop=self.loop)
+        reader.feed_data(data)
+        reader.feed_eof()
+        return reader
+
+    def test_001_aload(self):
+        for data_type in ('json/bytes', 'xml/bytes', 'yaml/bytes',):
+            data = self.serializer.dumps(self.children, data_type=data_type)
+            expected = self.serializer.loads(data, data_type=data_type)
+            result = self.loop.run_until_complete(
+                self.serializer.aload(self._stream(data), data_type=data_type, chunk_size=50))
+            self.assertEqual(result, expected)
+            chunks = [data[i:i + 30] for i in range(0, len(data), 30)]
+            result = self.loop.run_until_complete(
+                self.serializer.aload(_Chunks(self.loop, chunks), data_type=data_type))
+            self.assertEqual(result, expected)
+        serializer = Serializer(models.Child)
+        data = serializer.dumps(self.children[0])
+        self.assertEqual(self.loop.run_until_complete(serializer.aload(data)), serializer.loads(data))
+        data = self.serializer.dumps(self.children, data_type='json/bytes')[:-1]
+        with self.assertRaises(ParseError):
+            self.loop.run_until_complete(self.serializer.aload(self._stream(data)))
+
+    def test_002_adump(self):
+        for data_type in ('json/bytes', 'xml/bytes',):
+            writer = _Writer()
+            self.loop.run_until_complete(self.serializer.adump(self.children, writer, data_type=data_type))
+            self.assertEqual(self.serializer.loads(b''.join(writer.chunks), data_type=data_type),
+                             self.serializer.loads(self.serializer.dumps(self.children, data_type=data_type),
+                                                   data_type=data_type))
+            self.assertEqual(writer.drained, len(writer.chunks))
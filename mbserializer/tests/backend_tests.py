@@ -0,0 +1,64 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, json
+
+from mbserializer.tests import models
+from mbserializer import Serializer, set_json_backend
+from mbserializer.exceptions import ParseError
+from mbserializer._json import get_json_backend, register_json_backend, JsonBackend, StdlibJsonBackend
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class BackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.children = [{'name': 'Son Gohän'}, {'name': 'Son Goten', 'nickname': 'Goten/Trunks'}]
+
+    def test_001_stdlib_backend(self):
+        serializer = Serializer(models.Nickname)
+        self.assertIsInstance(get_json_backend(), StdlibJsonBackend)
+        self.assertEqual(serializer.dumps(self.children[1], data_type='json', backend='json'),
+                         json.dumps({'name': 'Son Goten', 'nickname': 'Goten/Trunks'}))
+        with self.assertRaises(ValueError):
+            get_json_backend('unknown')
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_002_orjson_backend(self):
+        serializer = Serializer(models.Nickname, json_backend='orjson')
+        for data in self.children:
+            expected = json.dumps(data, separators=(',', ':',), ensure_ascii=False)
+            self.assertEqual(serializer.dumps(data, data_type='json'), expected)
+            self.assertEqual(serializer.dumps(data, data_type='json/bytes'), expected.encode('utf-8'))
+            self.assertEqual(serializer.dumps(data, data_type='json', indent=2),
+                             json.dumps(data, indent=2, ensure_ascii=False))
+            self.assertEqual(serializer.loads(expected.encode('utf-8'), data_type='json'), data)
+        self.assertEqual(serializer.dumps(self.children[0], data_type='json', ensure_ascii=True),
+                         json.dumps(self.children[0]))
+        with self.assertRaises(ParseError):
+            serializer.loads(b'{"name": ', data_type='json')
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_003_global_backend(self):
+        serializer = Serializer(models.Nickname)
+        set_json_backend('auto')
+        try:
+            self.assertEqual(serializer.dumps(self.children[1], data_type='json'),
+                             '{"name":"Son Goten","nickname":"Goten/Trunks"}')
+        finally:
+            set_json_backend('json')
+
+    def test_004_default_backend_methods(self):
+        class PlainBackend(JsonBackend):
+            name = 'plain'
+
+        register_json_backend('plain', PlainBackend)
+        serializer = Serializer(models.Nickname, json_backend='plain')
+        for data_type in ('json', 'json/bytes',):
+            text = serializer.dumps(self.children[0], data_type=data_type)
+            self.assertEqual(text, Serializer(models.Nickname).dumps(self.children[0], data_type=data_type))
+            self.assertEqual(serializer.loads(text, data_type=data_type), self.children[0])
@@ -0,0 +1,18 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, json
+
+from mbserializer import benchmarks
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def test_001_run(self):
+        result = benchmarks.run(scale=0.01, number=1, repeat=1, data_types=('json', 'xml/bytes',))
+        json.dumps(result)
+        keys = set(benchmarks._key(r) for r in result['results'])
+        self.assertEqual(len(keys), len(benchmarks.SHAPES) * 2 * 2)
+        self.assertIn(('records', 'xml/bytes', 'loads',), keys)
+        for shape, data_type, operation, ratio in benchmarks.compare(result, result):
+            self.assertEqual(ratio, 1.0)
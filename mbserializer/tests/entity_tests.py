@@ -0,0 +1,136 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, pickle
+
+from collections import namedtuple
+from mbserializer.tests import models
+from mbserializer.tests import convert_tests
+from mbserializer.exceptions import FormatError
+from mbserializer import Model, Serializer, NotExist, SlotsEntity, LazyEntity
+from mbserializer.fields import element_fields as elems, list_fields as lists
+
+Point = namedtuple('Point', ('x', 'y',))
+Shape = namedtuple('Shape', ('name', 'center', 'points',))
+Person = namedtuple('Person', ('name', 'nickname',))
+
+
+class PointModel(Model):
+    __tag__ = 'point'
+    __entity__ = Point
+
+    x = elems.Int()
+    y = elems.Int()
+
+
+class ShapeModel(Model):
+    __tag__ = 'shape'
+
+    name = elems.Str()
+    center = elems.Delegate(PointModel)
+    points = lists.Delegate(PointModel, nested=True)
+
+
+class BagModel(Model):
+    __tag__ = 'bag'
+
+    items = lists.Str('item', nested=True)
+    values = elems.Int()
+    get = elems.Str()
+
+
+class EntityTestCase(unittest.TestCase):
+    def setUp(self):
+        case = convert_tests.ConvertTestCase('test_001_parent_xml')
+        case.setUp()
+        self.nested_parent = case.nested_parent
+
+    def test_001_slots_entity(self):
+        serializer = Serializer(models.NestedParent)
+        for data_type in ('json', 'xml', 'yaml',):
+            text = serializer.dumps(self.nested_parent, data_type=data_type)
+            expected = serializer.loads(text, data_type=data_type)
+            entity = serializer.loads(text, data_type=data_type, entity='slots')
+            self.assertIsInstance(entity, SlotsEntity)
+            self.assertFalse(hasattr(entity, '__dict__'))
+            self.assertIs(type(entity), models.NestedParent._getentityclass('slots'))
+            self.assertIsInstance(entity.child, SlotsEntity)
+            self.assertIsInstance(entity.nechildren[1], SlotsEntity)
+            self.assertEqual(entity.str_list, expected.str_list)
+            self.assertEqual(entity.child.datetime_elem, expected.child.datetime_elem)
+            self.assertEqual(entity.nechildren[1].str_attr, expected.nechildren[1].str_attr)
+            self.assertEqual(pickle.loads(pickle.dumps(entity, 2)), entity)
+
+    def test_002_slots_entity_not_exist(self):
+        serializer = Serializer(models.Nickname)
+        entity = serializer.loads('{"name": "Son Goku"}', data_type='json', entity='slots')
+        self.assertEqual(entity.name, 'Son Goku')
+        self.assertIs(entity.nickname, NotExist)
+        self.assertEqual(repr(entity), "NicknameEntity(name='Son Goku', nickname=NotExist)")
+
+    def test_003_unknown_entity(self):
+        with self.assertRaises(ValueError):
+            Serializer(models.Nickname).loads('{"name": "Son Goku"}', data_type='json', entity='unknown')
+
+    def test_004_model_entity(self):
+        serializer = Serializer(ShapeModel)
+        shape = {'name': 'line', 'center': Point(1, 1), 'points': [Point(0, 0), Point(2, 2)]}
+        for data_type in ('json', 'xml', 'yaml',):
+            text = serializer.dumps(shape, data_type=data_type)
+            entity = serializer.loads(text, data_type=data_type)
+            self.assertEqual(entity, {'name': 'line', 'center': Point(1, 1), 'points': [Point(0, 0), Point(2, 2)]})
+            self.assertIs(type(entity.center), Point)
+            entity = serializer.loads(text, data_type=data_type, into=Shape, entity='slots')
+            self.assertEqual(entity, Shape('line', Point(1, 1), [Point(0, 0), Point(2, 2)]))
+
+    def test_005_lazy_entity(self):
+        serializer = Serializer(models.NestedParent)
+        for data_type in ('json', 'xml', 'yaml',):
+            text = serializer.dumps(self.nested_parent, data_type=data_type)
+            expected = serializer.loads(text, data_type=data_type)
+            entity = serializer.loads(text, data_type=data_type, lazy=True)
+            self.assertIsInstance(entity, LazyEntity)
+            self.assertEqual(entity.child.datetime_elem, expected.child.datetime_elem)
+            self.assertEqual(entity['str_list'], expected.str_list)
+            self.assertRaises(AttributeError, getattr, entity, 'unknown')
+            self.assertEqual(entity.materialize(), expected)
+            self.assertEqual(entity, expected)
+            entity = serializer.loads(text, data_type=data_type, lazy=True, entity='slots')
+            self.assertIsInstance(entity.materialize(), SlotsEntity)
+            self.assertEqual(entity.child.datetime_elem, expected.child.datetime_elem)
+
+    def test_006_lazy_entity_errors(self):
+        serializer = Serializer(models.Nickname)
+        entity = serializer.loads('{"name": "Son Goku", "nickname": 1}', data_type='json', lazy=True)
+        self.assertEqual(entity.name, 'Son Goku')
+        self.assertRaises(FormatError, getattr, entity, 'nickname')
+        self.assertRaises(FormatError, entity.materialize)
+        entity = serializer.loads('{"name": "Son Goku"}', data_type='json', lazy=True)
+        self.assertIsNone(entity.get('nickname'))
+        self.assertEqual(dict(entity), {'name': 'Son Goku'})
+        entity = serializer.loads('{"name": "Son Goku"}', data_type='json', lazy=True, forcekey=True)
+        self.assertIs(entity.nickname, NotExist)
+
+    def test_007_lazy_entity_field_names(self):
+        serializer = Serializer(BagModel)
+        bag = {'items': ['a', 'b'], 'values': 3, 'get': 'c'}
+        for data_type in ('json', 'xml', 'yaml',):
+            text = serializer.dumps(bag, data_type=data_type)
+            expected = serializer.loads(text, data_type=data_type)
+            entity = serializer.loads(text, data_type=data_type, lazy=True)
+            for name in ('items', 'values', 'get',):
+                self.assertEqual(getattr(entity, name), getattr(expected, name))
+                self.assertEqual(entity[name], expected[name])
+            self.assertEqual(serializer.dumps(entity, data_type=data_type), text)
+            self.assertEqual(LazyEntity.materialize(entity), expected)
+
+    def test_008_factory_missing_fields(self):
+        serializer = Serializer(models.Nickname)
+        text = serializer.dumps({'name': 'Son Goku'}, data_type='xml')
+        for data_type, data in (('json', '{"name": "Son Goku"}'), ('yaml', 'name: Son Goku'), ('xml', text),):
+            expected = Person('Son Goku', NotExist)
+            self.assertEqual(serializer.loads(data, data_type=data_type, into=Person), expected)
+            self.assertEqual(serializer.loads(data, data_type=data_type, into=Person, lazy=True).materialize(),
+                             expected)
+            self.assertEqual(serializer.loads(data, data_type=data_type), {'name': 'Son Goku'})
@@ -1,6 +1,6 @@
 __author__ = 'Junki Ishida'
 
-from mbserializer import Model
+from mbserializer import Model, ListModel
 from mbserializer.fields import attribute_fields as attrs, element_fields as elems, list_fields as lists, text_fields as texts
 
 class NoElementChild(Model):
@@ -56,3 +56,11 @@ class Person(Model):
     gender = attrs.Enum(('male', 'female',), 'Gender')
     birthday = elems.Date('Birthday')
 
+class Nickname(Model):
+    name = elems.Str()
+    nickname = elems.Str(required=False)
+
+class Children(ListModel):
+    __tag__ = 'children'
+    __xmlns__ = 'http://mbserializer.com/children'
+    __model__ = Child
@@ -0,0 +1,63 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, pytz
+
+from decimal import Decimal
+from datetime import datetime
+from mbserializer.tests import models
+from mbserializer import Serializer, ParallelSerializer, SlotsEntity
+from mbserializer.exceptions import FormatError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ParallelTestCase(unittest.TestCase):
+    def setUp(self):
+        self.children = [
+            {
+                'int_text': i,
+                'str_elem': 'str{0}'.format(i),
+                'int_elem': i * 2,
+                'float_elem': 1.5,
+                'decimal_elem': Decimal('1.25'),
+                'bool_elem': i % 2 == 0,
+                'datetime_elem': datetime(2015, 1, 5, 8, 30, tzinfo=pytz.utc),
+            } for i in range(25)
+        ]
+        self.serializer = Serializer(models.Children)
+        self.parallel = ParallelSerializer(models.Children, workers=2, chunk_size=7)
+
+    def tearDown(self):
+        self.parallel.close()
+
+    def test_001_dumps_and_loads(self):
+        for data_type, options in (('json', {}), ('json/bytes', {'indent': 2}), ('yaml', {}), ('xml', {})):
+            for data in (self.children, [],):
+                text = self.serializer.dumps(data, data_type=data_type, **options)
+                self.assertEqual(self.parallel.dumps(iter(data), data_type=data_type, **options), text)
+                self.assertEqual(self.parallel.loads(text, data_type=data_type),
+                                 self.serializer.loads(text, data_type=data_type))
+        entities = self.parallel.loads(self.serializer.dumps(self.children), entity='slots')
+        self.assertIsInstance(entities[0], SlotsEntity)
+        self.assertEqual(entities[24].int_elem, 48)
+
+    def test_002_errors(self):
+        del self.children[20]['str_elem']
+        with self.assertRaises(FormatError):
+            self.parallel.dumps(self.children)
+        with self.assertRaises(ValueError):
+            ParallelSerializer(models.Children, chunk_size=0)
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_003_json_backend(self):
+        with ParallelSerializer(models.Children, workers=2, chunk_size=7, json_backend='orjson') as parallel:
+            for data_type in ('json', 'json/bytes',):
+                self.assertEqual(parallel.dumps(self.children, data_type=data_type),
+                                 self.serializer.dumps(self.children, data_type=data_type, backend='orjson'))
+        self.assertEqual(self.parallel.dumps(self.children, backend='orjson'),
+                         self.serializer.dumps(self.children, backend='orjson'))
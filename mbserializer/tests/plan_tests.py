@@ -0,0 +1,314 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, json, pytz
+
+from decimal import Decimal
+from datetime import datetime
+from mbserializer.tests import models
+from mbserializer import Serializer, NotExist
+from mbserializer.exceptions import FormatError
+
+
+class PlanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.child = {
+            'int_text': 1,
+            'str_elem': 'str',
+            'int_elem': 2,
+            'float_elem': 1.5,
+            'decimal_elem': Decimal('1.25'),
+            'bool_elem': False,
+            'datetime_elem': datetime(2015, 1, 5, 8, 30, tzinfo=pytz.utc),
+        }
+
+    def test_001_dump_plan_is_cached(self):
+        plan = models.Child._getdumpplan('json')
+        self.assertIs(plan, models.Child._getdumpplan('json'))
+        self.assertIsNot(plan, models.Child._getdumpplan('xml'))
+        self.assertEqual([p[0] for p in plan], list(models.Child._fields.keys()))
+
+    def test_002_dump_list_model(self):
+        text = Serializer(models.Children).dumps([self.child, self.child], data_type='json')
+        self.assertEqual(json.loads(text), [
+            {
+                'int_text': 1,
+                'str_elem': 'str',
+                'int_elem': 2,
+                'float_elem': 1.5,
+                'decimal_elem': '1.25',
+                'bool_elem': False,
+                'datetime_elem': '2015-01-05T08:30:00+0000',
+            },
+        ] * 2)
+
+    def test_003_dump_missing_key(self):
+        del self.child['str_elem']
+        serializer = Serializer(models.Child)
+        for data_type in ('json', 'yaml',):
+            with self.assertRaises(FormatError) as cm:
+                serializer.dumps(self.child, data_type=data_type)
+            self.assertEqual(str(cm.exception), '"str_elem" is not found.')
+
+    def test_004_dump_not_exist(self):
+        self.child['datetime_elem'] = NotExist
+        with self.assertRaises(FormatError):
+            Serializer(models.Child).dumps(self.child, data_type='json')
+
+    def test_005_parse_plan_is_cached(self):
+        plan = models.Child._getparseplan('json', False)
+        self.assertIs(plan, models.Child._getparseplan('json', None))
+        self.assertIsNot(plan, models.Child._getparseplan('json', True))
+
+    def test_006_load_list_model(self):
+        serializer = Serializer(models.Children)
+        for data_type in ('json', 'yaml',):
+            text = serializer.dumps([self.child, self.child], data_type=data_type)
+            entities = serializer.loads(text, data_type=data_type)
+            self.assertEqual(len(entities), 2)
+            self.assertEqual(entities[1].decimal_elem, Decimal('1.25'))
+            self.assertEqual(entities[1].datetime_elem, self.child['datetime_elem'])
+
+    def test_007_load_forcekey(self):
+        serializer = Serializer(models.Nickname)
+        entity = serializer.loads('{"name": "Son Goku"}', data_type='json')
+        self.assertNotIn('nickname', entity)
+        entity = serializer.loads('{"name": "Son Goku"}', data_type='json', forcekey=True)
+        self.assertIs(entity.nickname, NotExist)
+
+    def test_008_xml_plan_tags(self):
+        from mbserializer import _xml
+
+        plan = _xml._getxmlplan(models.NestedParent, 'xml', models.NestedParent.__xmlns__, False, True)
+        self.assertIs(plan, _xml._getxmlplan(models.NestedParent, 'xml', models.NestedParent.__xmlns__, False, True))
+        tags = dict((p[0], (p[5], p[6],)) for p in plan)
+        self.assertEqual(tags['str_list'], (
+            '{http://mbserializer.com/nested_parent}str_list', '{http://mbserializer.com/nested_parent}str',))
+        self.assertEqual(tags['child'], ('{http://mbserializer.com/child}child', None,))
+        self.assertEqual(tags['nechildren'], (
+            '{http://mbserializer.com/nechild}nechildren', '{http://mbserializer.com/nested_parent}nechild',))
+
+    def test_009_tag_cache_is_bounded(self):
+        from mbserializer import _xml
+
+        for i in range(_xml._TAG_CACHE_SIZE + 10):
+            self.assertEqual(_xml._gettag('tag', 'urn:{0}'.format(i)), '{{urn:{0}}}tag'.format(i))
+        self.assertLessEqual(len(_xml._tagcache), _xml._TAG_CACHE_SIZE)
+
+    def test_010_xml_list_order(self):
+        serializer = Serializer(models.Parent)
+        text = (
+            '<parent xmlns="http://mbserializer.com/parent">'
+            '<bool>true</bool><decimal>1</decimal><bool>false</bool><decimal>2</decimal><bool>false</bool>'
+            '</parent>'
+        )
+        entity = serializer.loads(text, data_type='xml')
+        self.assertEqual(entity.decimal_list, [Decimal('1'), Decimal('2')])
+        self.assertEqual(entity.bool_list, [True, False, False])
+        self.assertEqual(entity.childen, [])
+
+    def test_011_direct_json_writer(self):
+        serializer = Serializer(models.Children)
+        child = dict(self.child, str_elem='st"ré', float_elem=float('inf'))
+        optional = dict(self.child)
+        del optional['int_elem']
+        for data in ([child, self.child], [], [optional]):
+            for options in ({}, {'separators': (',', ':',)}, {'ensure_ascii': False}):
+                try:
+                    expected = serializer.dumps(data, data_type='json', **options)
+                except FormatError:
+                    with self.assertRaises(FormatError):
+                        serializer.dumps(data, data_type='json', direct=True, **options)
+                    continue
+                self.assertEqual(serializer.dumps(data, data_type='json', direct=True, **options), expected)
+                self.assertEqual(serializer.dumps(data, data_type='json/bytes', direct=True, **options),
+                                 expected.encode('utf-8'))
+        self.assertEqual(serializer.dumps([self.child], data_type='json', direct=True, indent=2),
+                         serializer.dumps([self.child], data_type='json', indent=2))
+
+    def test_012_yaml_key_order(self):
+        import yaml
+        from mbserializer._yaml import Dumper
+
+        serializer = Serializer(models.Child)
+        keys = [models.Child._fields[k].get_key(k) for k in models.Child._fields]
+        text = serializer.dumps(self.child, data_type='yaml', default_flow_style=False)
+        self.assertEqual([line.split(':')[0] for line in text.splitlines()], keys)
+        text = serializer.dumps(self.child, data_type='yaml', default_flow_style=False, ordered=False)
+        self.assertEqual([line.split(':')[0] for line in text.splitlines()], sorted(keys))
+        text = serializer.dumps(self.child, data_type='yaml', default_flow_style=False, Dumper=Dumper)
+        self.assertEqual([line.split(':')[0] for line in text.splitlines()], keys)
+        self.assertEqual(yaml.safe_load(text), yaml.safe_load(serializer.dumps(self.child, data_type='yaml')))
+
+    def test_013_batch(self):
+        from mbserializer.exceptions import ParseError
+
+        serializer = Serializer(models.Child)
+        broken = dict(self.child)
+        del broken['str_elem']
+        for data_type in ('json', 'json/bytes', 'xml', 'xml/bytes', 'yaml',):
+            texts = serializer.dumps_many([self.child, self.child], data_type=data_type)
+            self.assertEqual(texts, [serializer.dumps(self.child, data_type=data_type)] * 2)
+            self.assertEqual(serializer.loads_many(texts, data_type=data_type),
+                             [serializer.loads(texts[0], data_type=data_type)] * 2)
+            with self.assertRaises(FormatError):
+                serializer.dumps_many([self.child, broken], data_type=data_type)
+            results = serializer.dumps_many([broken, self.child], data_type=data_type, errors='collect')
+            self.assertIsInstance(results[0], FormatError)
+            self.assertEqual(results[1], texts[0])
+        results = serializer.loads_many(['{', serializer.dumps(self.child)], data_type='json', errors='collect')
+        self.assertIsInstance(results[0], ParseError)
+        self.assertEqual(results[1].str_elem, 'str')
+        with self.assertRaises(ValueError):
+            serializer.loads_many([], errors='ignore')
+
+    def test_014_xmlnsset_is_cached(self):
+        xmlnsset = models.NestedParent._getxmlnsset()
+        self.assertIs(xmlnsset, models.NestedParent._getxmlnsset())
+        self.assertIsNot(xmlnsset, models.Child._getxmlnsset())
+
+    def test_015_converter_registration(self):
+        import threading
+        from mbserializer import Model
+        from mbserializer.fields.declarations import StringElement
+
+        class UpperElement(StringElement):
+            pass
+
+        class Upper(Model):
+            upper = UpperElement()
+            lower = StringElement()
+
+        serializer = Serializer(Upper)
+        data = {'upper': 'abc', 'lower': 'abc'}
+        self.assertEqual(json.loads(serializer.dumps(data)), data)
+        plan = Upper._getdumpplan('json')
+        UpperElement.register_dump_converter('json', lambda value: value.upper())
+        self.assertIsNot(Upper._getdumpplan('json'), plan)
+        self.assertEqual(json.loads(serializer.dumps(data)), {'upper': 'ABC', 'lower': 'abc'})
+        self.assertEqual(StringElement()._getdumpconverter('json'), StringElement()._getdumpconverter('yaml'))
+        self.assertIsNone(StringElement()._getdumpconverter('unknown'))
+
+        results = []
+        errors = []
+
+        def dump():
+            try:
+                for _ in range(200):
+                    results.append(json.loads(serializer.dumps(data))['upper'])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=dump) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(50):
+            UpperElement.register_parse_converter('custom{0}'.format(i), lambda value: value)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(set(results), set(['ABC']))
+
+    def test_016_iso_datetime_converters(self):
+        from mbserializer import converters
+        from mbserializer.fields.declarations import DatetimeElement
+
+        field = DatetimeElement()
+        self.assertIs(field._getparseconverter('json').func, converters.str_to_isodatetime)
+        self.assertIs(DatetimeElement(format='%Y/%m/%d')._getparseconverter('json').func, converters.str_to_datetime)
+        format = converters.ISO_DATETIME_FORMAT
+        for value in ('2015-01-05T08:30:00Z', '2015-01-05T08:30:00+09:00', '2015-01-05T08:30:00-0130',
+                      '0999-01-05T08:30:00Z', '2015-01-05t08:30:00Z', '2015-01-05T08:30:00'):
+            for flexible in (True, False,):
+                try:
+                    expected = converters.str_to_datetime(value, format, None, flexible)
+                except ValueError:
+                    self.assertRaises(ValueError, converters.str_to_isodatetime, value, format, None, flexible)
+                    continue
+                result = converters.str_to_isodatetime(value, format, None, flexible)
+                self.assertEqual(result, expected)
+                self.assertEqual(result.utcoffset(), expected.utcoffset())
+                self.assertEqual(converters.datetime_to_isostr(result, format, None, flexible),
+                                 converters.datetime_to_str(result, format, None, flexible))
+        self.assertRaises(ValueError, converters.str_to_isodate, '2015-02-30', converters.ISO_DATE_FORMAT)
+        serializer = Serializer(models.Child)
+        self.assertEqual(serializer.loads(serializer.dumps(self.child))['datetime_elem'], self.child['datetime_elem'])
+
+    def test_017_decimal_mode(self):
+        from mbserializer import Model, converters
+        from mbserializer.fields.declarations import DecimalElement, FloatElement, DecimalList
+
+        class Ledger(Model):
+            amounts = DecimalList('amount')
+            total = DecimalElement()
+            rate = FloatElement()
+
+        serializer = Serializer(Ledger)
+        data = '{"amounts": [0.1, "2.50", 3], "total": 12345678901234567.891, "rate": 1.5}'
+        ledger = serializer.loads(data, 'json', decimal=True)
+        self.assertEqual(ledger['amounts'], [Decimal('0.1'), Decimal('2.50'), Decimal('3')])
+        self.assertEqual(ledger['total'], Decimal('12345678901234567.891'))
+        self.assertIsInstance(ledger['rate'], float)
+        self.assertEqual(serializer.loads(serializer.dumps(ledger), 'json'), ledger)
+        self.assertRaises(FormatError, serializer.loads, data, 'json')
+        self.assertRaises(FormatError, serializer.loads, '{"amounts": ["1", true], "total": "1", "rate": 1}')
+        self.assertEqual(converters.float_to_decimal(0.1), Decimal('0.1'))
+        self.assertEqual(converters.int_or_float_to_decimal(2.5), Decimal('2.5'))
+
+    def test_018_projected_fields(self):
+        from mbserializer.utils import _getmask
+        from mbserializer.tests import convert_tests
+
+        case = convert_tests.ConvertTestCase('test_001_parent_xml')
+        case.setUp()
+        serializer = Serializer(models.NestedParent)
+        fields = ['str_list', 'child.str_elem', 'nechildren.str_attr']
+        for data_type in ('json', 'xml', 'yaml',):
+            text = serializer.dumps(case.nested_parent, data_type=data_type)
+            expected = serializer.loads(text, data_type=data_type)
+            entity = serializer.loads(text, data_type=data_type, fields=fields)
+            self.assertEqual(entity, {
+                'str_list': expected.str_list,
+                'child': {'str_elem': expected.child.str_elem},
+                'nechildren': [{'str_attr': e.str_attr} for e in expected.nechildren],
+            })
+            self.assertEqual(serializer.loads(text, data_type=data_type, fields=['child']).child, expected.child)
+        mask = _getmask(models.NestedParent, fields)
+        self.assertIs(mask, _getmask(models.NestedParent, fields))
+        self.assertIs(mask, _getmask(models.NestedParent, list(reversed(fields)) + fields))
+        plan = models.NestedParent._getparseplan('json', False, mask=mask)
+        self.assertEqual([p[0] for p in plan[1]], ['str_list', 'child', 'nechildren'])
+        self.assertEqual(Serializer(models.Child).loads('{"str_elem": "a"}', fields='str_elem'), {'str_elem': 'a'})
+        for fields in (['unknown'], ['str_list.str'], ['child.unknown']):
+            self.assertRaises(ValueError, serializer.loads, '{}', fields=fields)
+
+    def test_019_masked_dump(self):
+        from mbserializer.utils import _getmask
+        from mbserializer.tests import convert_tests
+
+        case = convert_tests.ConvertTestCase('test_001_parent_xml')
+        case.setUp()
+        serializer = Serializer(models.NestedParent)
+        full = json.loads(serializer.dumps(case.nested_parent))
+        child = dict((k, v) for k, v in full['child'].items() if k != 'datetime_elem')
+        for options in ({}, {'direct': True},):
+            self.assertEqual(json.loads(serializer.dumps(case.nested_parent, only=['str_list', 'child.str_elem'],
+                                                         **options)),
+                             {'str_list': full['str_list'], 'child': {'str_elem': full['child']['str_elem']}})
+            self.assertEqual(json.loads(serializer.dumps(case.nested_parent, exclude=['nechildren', 'int_list',
+                                                                                      'child.datetime_elem'],
+                                                         **options)),
+                             {'str_list': full['str_list'], 'float_list': full['float_list'], 'child': child})
+            self.assertEqual(json.loads(serializer.dumps(case.nested_parent, only='child',
+                                                         exclude='child.datetime_elem', **options)),
+                             {'child': child})
+        text = serializer.dumps(case.nested_parent, 'xml', only=['child.str_elem'])
+        self.assertNotIn('str_list', text)
+        self.assertEqual(serializer.loads(text, 'xml', fields=['child.str_elem']),
+                         {'child': {'str_elem': full['child']['str_elem']}})
+        mask = _getmask(models.NestedParent, ['child'], ['child.datetime_elem'])
+        self.assertIs(models.NestedParent._getdumpplan('json', mask), models.NestedParent._getdumpplan('json', mask))
+        self.assertEqual(json.loads(Serializer(models.Child).dumps({'str_elem': 'a'}, only=['str_elem'])),
+                         {'str_elem': 'a'})
+        self.assertRaises(ValueError, serializer.dumps, case.nested_parent, exclude=['child.unknown'])
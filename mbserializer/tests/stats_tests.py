@@ -0,0 +1,83 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, pytz
+
+from decimal import Decimal
+from datetime import datetime
+from mbserializer.tests import models
+from mbserializer import Serializer, Stats
+
+
+class StatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.children = [
+            {
+                'int_text': i,
+                'str_elem': 'str{0}'.format(i),
+                'int_elem': i * 2,
+                'float_elem': 1.5,
+                'decimal_elem': Decimal('1.25'),
+                'bool_elem': i % 2 == 0,
+                'datetime_elem': datetime(2015, 1, 5, 8, 30, tzinfo=pytz.utc),
+            } for i in range(5)
+        ]
+        self.serializer = Serializer(models.Children)
+
+    def test_001_disabled(self):
+        self.assertIsNone(self.serializer.stats)
+        plan = models.Child._getdumpplan('json')
+        self.serializer.dumps(self.children)
+        self.assertIs(models.Child._getdumpplan('json'), plan)
+
+    def test_002_counts(self):
+        stats = Stats()
+        serializer = Serializer(models.Children, stats=stats)
+        for data_type in ('json', 'xml', 'yaml',):
+            text = serializer.dumps(self.children, data_type)
+            self.assertEqual(text, self.serializer.dumps(self.children, data_type))
+            self.assertEqual(serializer.loads(text, data_type), self.serializer.loads(text, data_type))
+        text = serializer.dumps(self.children, 'json/bytes')
+        self.assertEqual(len(list(serializer.iterload(text, 'json/bytes'))), 5)
+        self.assertEqual(b''.join(serializer.iterdump(self.children, 'json/bytes')), text)
+        self.assertEqual(len(serializer.loads_many([text, text], 'json/bytes')), 2)
+
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['models']['Children']['count'], 11)
+        self.assertEqual(snapshot['data_types']['json']['count'], 2)
+        self.assertEqual(snapshot['data_types']['json/bytes']['count'], 5)
+        self.assertEqual(snapshot['data_types']['json/bytes']['bytes_in'], len(text) * 3)
+        self.assertEqual(snapshot['data_types']['json/bytes']['bytes_out'], len(text) * 2)
+        self.assertEqual(snapshot['fields']['Child.str_elem']['count'], 5 * 11)
+        self.assertGreater(snapshot['fields']['Child.datetime_elem']['time'], 0)
+
+        results = []
+        stats.export(results.append)
+        self.assertEqual(results, [snapshot])
+        stats.reset()
+        self.assertEqual(stats.snapshot()['models']['Children'], {'count': 0, 'time': 0})
+        self.assertRaises(ValueError, stats.export)
+
+    def test_003_plans(self):
+        self.serializer.dumps(self.children)
+        plans = dict(models.Child._plans)
+        for i in range(20):
+            Serializer(models.Children, stats=True).dumps(self.children)
+        self.assertEqual(models.Child._plans, plans)
+
+    def test_004_nested_models(self):
+        from mbserializer.tests import convert_tests
+
+        case = convert_tests.ConvertTestCase('test_001_parent_xml')
+        case.setUp()
+        stats = Stats()
+        serializer = Serializer(models.NestedParent, stats=stats)
+        for data_type in ('json', 'xml', 'yaml',):
+            serializer.loads(serializer.dumps(case.nested_parent, data_type), data_type)
+        fields = stats.snapshot()['fields']
+        self.assertEqual(fields['Child.str_elem']['count'], 6)
+        self.assertEqual(fields['NestedParent.str_list']['count'], 6 * len(case.nested_parent.str_list))
+        self.assertNotIn('NestedParent.child', fields)
+        self.assertNotIn('NestedParent.nechildren', fields)
+        self.assertTrue(all(v['count'] > 0 for v in fields.values()))
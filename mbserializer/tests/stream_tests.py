@@ -0,0 +1,168 @@
+# coding: utf-8
+
+__author__ = 'Junki Ishida'
+
+import unittest, io, pytz
+
+from decimal import Decimal
+from datetime import datetime
+from mbserializer.tests import models
+from mbserializer import Serializer, register_xmlnsmap
+from mbserializer.exceptions import FormatError, ParseError
+from mbserializer._json import JsonArrayDecoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _children(count):
+    for i in range(count):
+        yield {
+            'int_text': i,
+            'str_elem': 'str\n"{0}"'.format(i),
+            'int_elem': i * 2,
+            'float_elem': 1.5,
+            'decimal_elem': Decimal('1.25'),
+            'bool_elem': i % 2 == 0,
+            'datetime_elem': datetime(2015, 1, 5, 8, 30, tzinfo=pytz.utc),
+        }
+
+
+class StreamTestCase(unittest.TestCase):
+    def test_001_iterdump_json(self):
+        serializer = Serializer(models.Children)
+        for count in (0, 1, 3,):
+            for options in ({}, {'indent': 2}, {'indent': '\t', 'ordered': False}, {'separators': (',', ':')},):
+                expected = serializer.dumps(list(_children(count)), data_type='json', **options)
+                chunks = list(serializer.iterdump(_children(count), data_type='json', **options))
+                self.assertEqual(''.join(chunks), expected)
+
+    def test_002_dump_json_file(self):
+        serializer = Serializer(models.Children)
+        fp = io.BytesIO()
+        serializer.dump(_children(3), fp, data_type='json/bytes')
+        self.assertEqual(fp.getvalue(), serializer.dumps(list(_children(3)), data_type='json/bytes'))
+
+    def test_003_iterdump_fallback(self):
+        serializer = Serializer(models.Children)
+        chunks = list(serializer.iterdump(list(_children(2)), data_type='yaml'))
+        self.assertEqual(chunks, [serializer.dumps(list(_children(2)), data_type='yaml')])
+
+    def test_004_iterload_json(self):
+        serializer = Serializer(models.Children)
+        text = serializer.dumps(list(_children(5)), data_type='json', indent=2)
+        expected = serializer.loads(text, data_type='json')
+        for chunk_size in (1, 7, 65536,):
+            for data in (io.StringIO(text), io.BytesIO(text.encode('utf-8')),):
+                entities = list(serializer.iterload(data, data_type='json', chunk_size=chunk_size))
+                self.assertEqual(entities, expected)
+        self.assertEqual(list(serializer.iterload(' [ ] ', data_type='json')), [])
+
+    def test_005_iterload_json_error(self):
+        serializer = Serializer(models.Children)
+        text = serializer.dumps(list(_children(2)), data_type='json')
+        for data in (text[:-1], text + '[]', '{}', text.replace('}, {', '} {'),):
+            with self.assertRaises(ParseError):
+                list(serializer.iterload(io.StringIO(data), data_type='json', chunk_size=16))
+
+    def _children_xml(self, count):
+        serializer = Serializer(models.Child)
+        items = ''.join(serializer.dumps(c, data_type='xml', xml_declaration=False) for c in _children(count))
+        return '<?xml version="1.0"?>\n<children xmlns="{0}"><!-- comment -->{1}</children>'.format(
+            models.Children.__xmlns__, items)
+
+    def test_006_iterload_xml(self):
+        serializer = Serializer(models.Children)
+        text = self._children_xml(5)
+        expected = serializer.loads(text, data_type='xml')
+        self.assertEqual(len(expected), 5)
+        for data in (text, io.BytesIO(text.encode('utf-8')),):
+            self.assertEqual(list(serializer.iterload(data, data_type='xml')), expected)
+
+    def test_007_iterload_xml_error(self):
+        serializer = Serializer(models.Children)
+        text = self._children_xml(2)
+        with self.assertRaises(FormatError):
+            list(serializer.iterload(text.replace('children', 'parents'), data_type='xml'))
+        with self.assertRaises(FormatError):
+            list(serializer.iterload(text.replace('<!-- comment -->', '<unknown/>'), data_type='xml'))
+        with self.assertRaises(ParseError):
+            list(serializer.iterload(text[:-5], data_type='xml'))
+        text = text.replace('?>\n', '?>\n<!DOCTYPE children [<!ENTITY a "aaaa">]>\n').replace('str\n', '&a;')
+        with self.assertRaises(ParseError):
+            list(serializer.iterload(text, data_type='xml'))
+
+    def test_008_iterdump_xml(self):
+        serializer = Serializer(models.Children)
+        expected = serializer.loads(serializer.dumps(list(_children(3)), data_type='xml'), data_type='xml')
+        self.assertEqual(len(expected), 3)
+        chunks = list(serializer.iterdump(_children(3), data_type='xml'))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(serializer.loads(''.join(chunks), data_type='xml'), expected)
+        fp = io.BytesIO()
+        serializer.dump(_children(3), fp, data_type='xml/bytes')
+        fp.seek(0)
+        self.assertEqual(list(serializer.iterload(fp, data_type='xml')), expected)
+        self.assertEqual(serializer.loads(''.join(serializer.iterdump((), data_type='xml')), data_type='xml'), [])
+
+    def test_009_load_buffers(self):
+        import os, array, tempfile
+
+        serializer = Serializer(models.Children)
+        children = list(_children(5))
+        cases = [('json/bytes', {}), ('json/bytes', {'backend': 'json'}), ('json/bytes', {'decimal': True}),
+                 ('xml/bytes', {}), ('yaml/bytes', {})]
+        if orjson is not None:
+            cases += [('json/bytes', {'backend': 'orjson'}), ('json/bytes', {'backend': 'orjson', 'decimal': True})]
+        for data_type, options in cases:
+            data = serializer.dumps(children, data_type=data_type)
+            expected = serializer.loads(data, data_type=data_type)
+            for buffer in (memoryview(data), bytearray(data), array.array('b', data)):
+                self.assertEqual(serializer.loads(buffer, data_type=data_type, **options), expected)
+            self.assertEqual(list(serializer.iterload(memoryview(data), data_type=data_type, chunk_size=64)), expected)
+            fd, path = tempfile.mkstemp()
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                self.assertEqual(serializer.load(path, data_type=data_type, **options), expected)
+                with open(path, 'rb') as f:
+                    self.assertEqual(serializer.load(f, data_type=data_type, **options), expected)
+                open(path, 'wb').close()
+                with self.assertRaises((ParseError, FormatError,)):
+                    serializer.load(path, data_type=data_type, **options)
+            finally:
+                os.remove(path)
+
+    def test_010_json_parser_feed(self):
+        serializer = Serializer(models.Children)
+        items = [Serializer(models.Child).dumps(c, data_type='json') for c in _children(2)]
+        expected = serializer.loads('[' + ', '.join(items) + ']', data_type='json')
+        escape = items[1].index('\\"') + 1
+        parser = serializer.parser('json')
+        self.assertEqual(parser.feed('[' + items[0][:-5]), [])
+        self.assertEqual(parser.feed(items[0][-5:] + ','), expected[:1])
+        self.assertEqual(parser.feed(' ' + items[1][:escape]), [])
+        self.assertEqual(parser.feed(items[1][escape:]), expected[1:])
+        self.assertEqual(parser.feed(']'), [])
+        self.assertEqual(parser.close(), [])
+        for head, tail, value in (('[1.', '5]', 1.5), ('[1e', '3]', 1000.0), ('[-', '2]', -2), ('[12', ']', 12),):
+            decoder = JsonArrayDecoder()
+            self.assertEqual(decoder.feed(head), [])
+            self.assertEqual(decoder.feed(tail), [value])
+            self.assertEqual(decoder.close(), [])
+
+    def test_011_iterdump_xml_namespaces(self):
+        serializer = Serializer(models.Children)
+        children = list(_children(3))
+        self.assertEqual(''.join(serializer.iterdump(children, data_type='xml')), serializer.dumps(children, 'xml'))
+        register_xmlnsmap(c=models.Child.__xmlns__)
+        text = b''.join(serializer.iterdump(children, data_type='xml/bytes', only=['str_elem']))
+        self.assertEqual(text, serializer.dumps(children, 'xml/bytes', only=['str_elem']))
+        self.assertEqual(text.count(b'xmlns'), 2)
+        children[1]['str_elem'] = u'\u20ac <&>'
+        for options in ({'pretty_print': True}, {'encoding': 'utf-16'},
+                        {'encoding': 'iso-8859-1', 'pretty_print': True},):
+            self.assertEqual(b''.join(serializer.iterdump(children, data_type='xml/bytes', **options)),
+                             serializer.dumps(children, 'xml/bytes', **options))
@@ -3,8 +3,12 @@
 __author__ = 'Junki Ishida'
 
 from .exceptions import FormatError
-from .declarations import NotExist, Entity
-from ._compat import iteritems, OrderedDict
+from .declarations import NotExist, Entity, LazyEntity
+from . import converters
+from ._compat import iteritems, str_types, unicode_type, OrderedDict
+
+import itertools
+import threading
 
 try:
     from lxml.etree import QName
@@ -24,56 +28,277 @@ def getvalue(data, key, isdict, default=None):
     return getattr(data, key, default)
 
 
-def _to_dict(model_class, data_type, data, ordered):
+_generations = itertools.count(1)
+_generation = 0
+
+
+def _nextgeneration():
+    global _generation
+    _generation = next(_generations)
+
+
+_local = threading.local()
+_instrumented = 0
+_instrumented_lock = threading.Lock()
+
+
+def _getstats():
+    return getattr(_local, 'stats', None) if _instrumented else None
+
+
+def _setstats(stats):
+    global _instrumented
+    previous = getattr(_local, 'stats', None)
+    with _instrumented_lock:
+        _instrumented += (stats is not None) - (previous is not None)
+    _local.stats = stats
+    return previous
+
+
+def _instrument(model_class, name, field, converter):
+    stats = _getstats()
+    if stats is None or _getkind(field) in (DELEGATE, DELEGATE_LIST):
+        return converter
+    return stats._timer(model_class, name, converter)
+
+
+SCALAR = 0
+DELEGATE = 1
+LIST = 2
+DELEGATE_LIST = 3
+
+_MISSING = object()
+
+
+def _identity(value):
+    return value
+
+
+def _getkind(field):
+    if field._islist:
+        return DELEGATE_LIST if field._islistdelegate else LIST
+    return DELEGATE if field._isdelegate else SCALAR
+
+
+def _compile_dump_plan(model_class, data_type, mask=None):
+    plan = []
+    for k, f, submask in _masked(model_class, mask):
+        kind = _getkind(f)
+        subplan = f.model_class._getdumpplan(data_type, submask) if kind in (DELEGATE, DELEGATE_LIST) else None
+        converter = _instrument(model_class, k, f, f._getdumpconverter(data_type) or _identity)
+        plan.append((k, f.get_key(k), f._required, f._nullable, kind, converter, subplan,))
+    return tuple(plan)
+
+
+def _dump_dict(plan, data, ordered):
     isdict = isinstance(data, dict)
     result = OrderedDict() if ordered else {}
-    for k, f in iteritems(model_class._fields):
-        if not haskey(data, k, isdict):
-            if not f._required:
+    for k, key, required, nullable, kind, converter, subplan in plan:
+        src = data.get(k, _MISSING) if isdict else getattr(data, k, _MISSING)
+        if src is _MISSING:
+            if not required:
                 continue
             raise FormatError('"{0}" is not found.'.format(k))
-        src = getvalue(data, k, isdict)
-        if not f._required and src is NotExist:
+        if not required and src is NotExist:
             continue
-        if f._nullable and src is None:
+        if nullable and src is None:
             value = None
+        elif kind == SCALAR:
+            value = converter(src)
+        elif kind == DELEGATE:
+            value = _dump_dict(subplan, src, ordered)
+        elif kind == LIST:
+            value = [converter(v) for v in src]
         else:
-            if f._islist:
-                value = []
-                for v in src:
-                    item = _to_dict(f.model_class, data_type, v, ordered) \
-                        if f._islistdelegate else f._dump(v, data_type)
-                    value.append(item)
-            else:
-                value = _to_dict(f.model_class, data_type, src, ordered) \
-                    if f._isdelegate else f._dump(src, data_type)
-        result[f.get_key(k)] = value
+            value = [_dump_dict(subplan, v, ordered) for v in src]
+        result[key] = value
     return result
 
 
-def _parse_dict(model_class, data_type, data, forcekey):
-    entity = Entity()
-    for k, f in model_class._fields.items():
-        key = f.get_key(k)
+def _to_dict(model_class, data_type, data, ordered, mask=None):
+    return _dump_dict(model_class._getdumpplan(data_type, mask), data, ordered)
+
+
+def _getfactory(model_class, entity):
+    factory = model_class._getentityclass(entity)
+    return None if factory is Entity else factory
+
+
+def _parsepaths(model_class, paths, prefix):
+    selected = OrderedDict()
+    for path in paths:
+        name, _, rest = path.partition('.')
+        field = model_class._fields.get(name)
+        if field is None:
+            raise ValueError('unknown field: {0}{1}'.format(prefix, path))
+        if not rest:
+            selected[name] = None
+        elif _getkind(field) not in (DELEGATE, DELEGATE_LIST):
+            raise ValueError('not a delegate field: {0}{1}'.format(prefix, path))
+        elif selected.get(name, ()) is not None:
+            selected.setdefault(name, []).append(rest)
+    return selected
+
+
+def _compile_mask(model_class, fields, exclude=(), prefix=''):
+    if fields is None:
+        selected = OrderedDict((k, None,) for k in model_class._fields)
+    else:
+        selected = _parsepaths(model_class, fields, prefix)
+    excluded = _parsepaths(model_class, exclude, prefix)
+    mask = []
+    for k, v in iteritems(selected):
+        subexclude = excluded.get(k, ())
+        if subexclude is None:
+            continue
+        if v is not None or subexclude:
+            v = _compile_mask(model_class._fields[k].model_class, v, subexclude, prefix + k + '.')
+        mask.append((k, v,))
+    return frozenset(mask)
+
+
+def _paths(paths):
+    if paths is None:
+        return None
+    return frozenset((paths,) if isinstance(paths, str_types) else paths)
+
+
+_MASK_CACHE_SIZE = 1024
+_maskcache = {}
+
+
+def _getmask(model_class, fields, exclude=None):
+    if fields is None and exclude is None:
+        return None
+    fields = _paths(fields)
+    exclude = _paths(exclude) or frozenset()
+    key = (model_class, fields, exclude,)
+    mask = _maskcache.get(key)
+    if mask is None:
+        mask = _compile_mask(model_class, fields, exclude)
+        if len(_maskcache) >= _MASK_CACHE_SIZE:
+            _maskcache.clear()
+        _maskcache[key] = mask
+    return mask
+
+
+def _popmask(model_class, options):
+    return _getmask(model_class, options.pop('only', None), options.pop('exclude', None))
+
+
+def _masked(model_class, mask):
+    if mask is None:
+        return ((k, f, None,) for k, f in iteritems(model_class._fields))
+    selected = dict(mask)
+    return ((k, f, selected[k],) for k, f in iteritems(model_class._fields) if k in selected)
+
+
+def _compile_parse_plan(model_class, data_type, forcekey, entity, mask=None):
+    plan = []
+    for k, f, submask in _masked(model_class, mask):
+        kind = _getkind(f)
+        subplan = f.model_class._getparseplan(data_type, forcekey, entity, submask) \
+            if kind in (DELEGATE, DELEGATE_LIST) else None
+        converter = f._getparseconverter(data_type) or _identity
+        if kind == LIST and converter in converters.list_converters:
+            kind, converter = SCALAR, converters.list_converters[converter]
+        converter = _instrument(model_class, k, f, converter)
+        missing = NotExist if forcekey else _MISSING
+        plan.append((k, f.get_key(k), f._required, missing, f._nullable, kind, converter, subplan,))
+    return _getfactory(model_class, entity), tuple(plan)
+
+
+def _parse_entity(plan, data):
+    factory, plan = plan
+    entity = Entity() if factory is None else {}
+    for k, key, required, missing, nullable, kind, converter, subplan in plan:
         if not key in data:
-            if not f._required:
-                if forcekey:
+            if not required:
+                if missing is not _MISSING:
+                    entity[k] = missing
+                elif factory is not None:
                     entity[k] = NotExist
                 continue
             raise FormatError()
         src = data[key]
-        if f._nullable and src is None:
+        if nullable and src is None:
             value = None
+        elif kind == SCALAR:
+            value = converter(src)
+        elif kind == DELEGATE:
+            value = _parse_entity(subplan, src)
+        elif src is None:
+            value = []
+        elif kind == LIST:
+            value = [converter(v) for v in src]
         else:
-            if f._islist:
-                value = []
-                if src is not None:
-                    for v in src:
-                        item = _parse_dict(f.model_class, data_type, v, forcekey) \
-                            if f._islistdelegate else f._parse(v, data_type)
-                        value.append(item)
-            else:
-                value = _parse_dict(f.model_class, data_type, src, forcekey) \
-                    if f._isdelegate else f._parse(src, data_type)
+            value = [_parse_entity(subplan, v) for v in src]
         entity[k] = value
-    return entity
+    return entity if factory is None else factory(**entity)
+
+
+def _withfactory(plan, into):
+    if into is None:
+        return plan
+    return into, plan[1]
+
+
+def _compile_lazy_fields(model_class, plan):
+    return dict((entry[0], (None, (entry,),)) for entry in plan)
+
+
+def _lazyparser(parse, model_class, plan):
+    fields = model_class._getplan(('lazy', id(plan[1]),), _compile_lazy_fields, plan[1])
+    return lambda plan, data: LazyEntity(parse, plan, fields, data)
+
+
+def _parse_dict(model_class, data_type, data, forcekey, entity=None, into=None):
+    return _parse_entity(_withfactory(model_class._getparseplan(data_type, forcekey, entity), into), data)
+
+
+def _getbuffer(data):
+    if isinstance(data, (bytes,) + str_types):
+        return None
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return None
+    if view.ndim != 1 or view.format != 'B':
+        view = view.cast('B')
+    return view
+
+
+def _iterchunks(data, chunk_size):
+    if isinstance(data, (bytes,) + str_types):
+        yield data
+        return
+    buffer = _getbuffer(data)
+    if buffer is not None:
+        for i in range(0, len(buffer), chunk_size):
+            yield buffer[i:i + chunk_size]
+        return
+    while True:
+        chunk = data.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class _BufferedParser(object):
+    def __init__(self, load, islist):
+        self.load = load
+        self.islist = islist
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+        return []
+
+    def close(self):
+        chunks = self.chunks
+        if len(chunks) == 1:
+            data = chunks[0]
+        else:
+            data = (u'' if chunks and isinstance(chunks[0], unicode_type) else b'').join(chunks)
+        result = self.load(data)
+        return result if self.islist else [result]
@@ -16,7 +16,7 @@ setup(
     author='Junki Ishida',
     author_email='gomafutofu@gmail.com',
     url='https://github.com/gomafutofu/mbserializer',
-    packages=['mbserializer', 'mbserializer.fields'],
+    packages=['mbserializer', 'mbserializer.fields', 'mbserializer.benchmarks'],
     license='MIT',
     tests_require=tests_require,
     classifiers=[